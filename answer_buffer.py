@@ -0,0 +1,161 @@
+from fastapi import HTTPException
+from collections import Counter
+from datetime import datetime
+from mysql.connector import Error
+from db import run_db
+import asyncio
+import time
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# write-behind 버퍼 설정
+BUFFER_MAX_ROWS = int(os.getenv("ANSWER_BUFFER_MAX_ROWS", 100))          # 이 행 수가 쌓이면 즉시 기록
+BUFFER_FLUSH_INTERVAL = float(os.getenv("ANSWER_BUFFER_FLUSH_INTERVAL", 1.0))  # 최대 대기 시간(초)
+# 이 행 수 이상 밀려 있으면 503. 배치 크기가 아니라 동시 세션 수에 맞춘다
+# (세션 수천 개가 몇 초마다 답변하면 flush 한 번 동안 수백~수천 행이 쌓임, 행당 수백 바이트)
+BUFFER_MAX_DEPTH = int(os.getenv("ANSWER_BUFFER_MAX_DEPTH", 10000))
+
+
+class AnswerBuffer:
+    """answers 행을 모아 두었다가 크기/시간 기준으로 한 번에 기록하는 write-behind 버퍼.
+
+    writer(conn, rows)는 rows 전체를 한 트랜잭션으로 기록하는 동기 함수이다.
+    """
+
+    def __init__(self, writer, max_rows=BUFFER_MAX_ROWS, flush_interval=BUFFER_FLUSH_INTERVAL,
+                 max_depth=BUFFER_MAX_DEPTH):
+        self.writer = writer
+        self.max_rows = max_rows
+        self.max_depth = max_depth
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._pending_ids = Counter()
+        self._inflight_ids = set()
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task = None
+        # 지표
+        self.flush_count = 0
+        self.flushed_rows = 0
+        self.dropped_rows = 0
+        self.rejected_rows = 0
+        self.last_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def enqueue(self, row):
+        # row = (learning_log_id, sceneId, question, answer, response), 받은 시각을 붙여 기록
+        # DB 장애로 기록이 밀리면 더 받지 않고 거절 (메모리와 재시도 배치 크기 제한)
+        if len(self._pending) >= self.max_depth:
+            self.rejected_rows += 1
+            raise HTTPException(status_code=503, detail="Answer buffer is full")
+        self._pending.append((*row, datetime.now()))
+        self._pending_ids[row[0]] += 1
+        if len(self._pending) >= self.max_rows:
+            self._wake.set()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            self._inflight_ids = set(self._pending_ids)
+            self._pending_ids = Counter()
+
+            start = time.perf_counter()
+            write = asyncio.ensure_future(run_db(self._write, rows))
+            try:
+                await asyncio.wait([write])
+            except asyncio.CancelledError:
+                # 취소돼도 DB 스레드의 기록은 계속되므로, 끝날 때까지 기다려 결과를 반영한 뒤 취소를 전달
+                await asyncio.wait([write])
+                self._finish(rows, write, start)
+                raise
+
+            error = self._finish(rows, write, start)
+            if error is not None:
+                raise error
+
+    def _finish(self, rows, write, start):
+        self._inflight_ids = set()
+        error = write.exception()
+        if error is not None:
+            # 기록 실패 시 다음 flush 때 다시 시도하도록 되돌림
+            self._pending[:0] = rows
+            for row in rows:
+                self._pending_ids[row[0]] += 1
+            return error
+
+        dropped = write.result()
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        self.total_flush_ms += self.last_flush_ms
+        self.flush_count += 1
+        self.flushed_rows += len(rows) - dropped
+        self.dropped_rows += dropped
+        return None
+
+    def _write(self, conn, rows):
+        try:
+            self.writer(conn, rows)
+            return 0
+        except Error as e:
+            # 일괄 기록이 실패하면 행 단위로 다시 기록하고, 실패한 행만 버린다
+            print(f"Answer buffer batch failed, retrying per row: {e}")
+            conn.rollback()
+
+        dropped = 0
+        for row in rows:
+            try:
+                self.writer(conn, [row])
+            except Error as e:
+                print(f"Dropping answer row {row}: {e}")
+                conn.rollback()
+                dropped += 1
+        return dropped
+
+    async def flush_for(self, learning_log_id):
+        # 읽기 전에 해당 학습 기록의 미기록 행이 DB에 반영되도록 보장 (flush-before-read)
+        if learning_log_id in self._pending_ids or learning_log_id in self._inflight_ids:
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Answer buffer flush failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        # 종료 시 남은 행을 모두 기록
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self):
+        return {
+            "depth": len(self._pending),
+            "inflight_logs": len(self._inflight_ids),
+            "flush_count": self.flush_count,
+            "flushed_rows": self.flushed_rows,
+            "dropped_rows": self.dropped_rows,
+            "rejected_rows": self.rejected_rows,
+            "max_depth": self.max_depth,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0,
+        }
@@ -4,7 +4,11 @@ import jwt  # PyJWT 사용
 from jwt import PyJWTError
 import os
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+import hashlib
+import threading
+import time
 
 # 환경 변수 로드
 load_dotenv()
@@ -17,24 +21,120 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
+# 검증된 토큰 캐시 설정
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))    # 최대 보관 토큰 수
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", 300))      # exp 와 별개로 캐시에 두는 최대 시간(초)
+
 # JWT 토큰 생성 함수
 def create_access_token(data: dict):
     to_encode = data.copy()
-    #expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    #to_encode.update({"exp": expire})
+    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 # OAuth2PasswordBearer를 사용하여 토큰 추출
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-# JWT 토큰 검증 함수
-def verify_token(token: str = Depends(oauth2_scheme)):
+
+class TokenCache:
+    """서명 검증을 마친 토큰의 LRU 캐시와 폐기 목록.
+
+    키는 토큰 원문 대신 sha256 digest 를 쓴다. 항목은 토큰의 exp 또는 TOKEN_CACHE_TTL 중
+    먼저 오는 시각에 만료된다. 폐기 목록도 메모리에만 있으므로 프로세스마다 따로 관리된다.
+    """
+
+    def __init__(self, max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # digest -> (username, 만료 시각)
+        self._revoked = {}              # digest -> 토큰 exp (None 이면 만료 없음)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest, username, exp):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        with self._lock:
+            self._entries[digest] = (username, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, digest):
+        return digest in self._revoked
+
+    def revoke(self, digest, exp):
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked[digest] = exp
+            # 이미 만료된 토큰은 어차피 검증에서 걸리므로 목록에서 뺀다
+            for key in [k for k, v in self._revoked.items() if v is not None and v <= now]:
+                del self._revoked[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "revoked": len(self._revoked),
+            }
+
+
+token_cache = TokenCache()
+
+
+def _token_digest(token: str):
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _decode(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-        return username
+        # exp 가 없는 예전 토큰은 영원히 유효하고 폐기 기록도 정리되지 않으므로 거부
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "sub"]})
     except PyJWTError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return payload
+
+
+# JWT 토큰 검증 함수
+def verify_token(token: str = Depends(oauth2_scheme)):
+    digest = _token_digest(token)
+    if token_cache.is_revoked(digest):
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    username = token_cache.get(digest)
+    if username is not None:
+        return username
+
+    payload = _decode(token)
+    username: str = payload["sub"]
+    token_cache.put(digest, username, payload["exp"])
+    return username
+
+
+# 토큰 폐기 (로그아웃). 이후 같은 토큰은 캐시와 무관하게 거부된다
+def revoke_token(token: str):
+    payload = _decode(token)
+    token_cache.revoke(_token_digest(token), payload["exp"])
+    return payload["sub"]
@@ -0,0 +1,137 @@
+"""/learn/step + /statics 혼합 트래픽 동시성 벤치마크.
+
+MySQL 대신 쿼리마다 --query-ms 만큼 블로킹되는 가짜 드라이버를 쓰고, 앱을 프로세스 안에서
+(httpx ASGITransport) 구동한다. 두 모드를 비교한다.
+
+  blocking  : 핸들러가 이벤트 루프에서 DB를 직접 호출하던 이전 방식
+  offloaded : run_db 로 DB 스레드 풀에서 실행하는 현재 방식
+
+사용법: python benchmarks/concurrency.py --concurrency 50 --duration 5
+(httpx 필요: pip install httpx)
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import db
+import main
+
+
+class FakeRow(dict):
+    # 어떤 컬럼을 읽어도 1을 돌려준다
+    def __missing__(self, key):
+        return 1
+
+    def __bool__(self):
+        return True
+
+
+class FakeCursor:
+    # dictionary 커서는 FakeRow 한 행, 일반 커서는 빈 결과를 돌려준다
+    def __init__(self, query_ms, dictionary):
+        self.query_ms = query_ms
+        self.dictionary = dictionary
+        self.rowcount = 1
+        self.lastrowid = 1
+
+    def execute(self, query, params=None):
+        time.sleep(self.query_ms / 1000)
+
+    def executemany(self, query, rows):
+        time.sleep(self.query_ms / 1000)
+
+    def fetchone(self):
+        return FakeRow() if self.dictionary else None
+
+    def fetchall(self):
+        return [FakeRow()] if self.dictionary else []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    unread_result = False
+    in_transaction = False
+
+    def __init__(self, query_ms):
+        self.query_ms = query_ms
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.query_ms, dictionary)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+async def run_db_blocking(func, *args):
+    # 이전 방식: 이벤트 루프 스레드에서 그대로 실행
+    return db._call_with_connection(func, args)
+
+
+async def worker(client, deadline, latencies):
+    i = 0
+    while time.perf_counter() < deadline:
+        if i % 2 == 0:
+            path = "/learn/step"
+            request = client.post(path, json={
+                "learning_log_id": 1, "sceneId": "1", "question": "q", "answer": "a", "response": "r",
+            })
+        else:
+            path = "/statics"
+            request = client.get(path, params={"user_id": "u", "profile_name": "p"})
+        start = time.perf_counter()
+        response = await request
+        response.raise_for_status()
+        latencies.setdefault(path, []).append(time.perf_counter() - start)
+        i += 1
+
+
+async def run(mode, concurrency, duration):
+    main.run_db = run_db_blocking if mode == "blocking" else db.run_db
+    latencies = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(client, deadline, latencies) for _ in range(concurrency)))
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"[{mode}] {total / duration:.1f} req/s")
+    for path, values in sorted(latencies.items()):
+        values.sort()
+        p95 = values[int(len(values) * 0.95) - 1]
+        print(f"  {path:12s} n={len(values):6d} p50={statistics.median(values) * 1000:7.1f}ms p95={p95 * 1000:7.1f}ms")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--query-ms", type=float, default=5.0, help="가짜 쿼리 1건당 지연(ms)")
+    parser.add_argument("--mode", choices=["blocking", "offloaded", "both"], default="both")
+    args = parser.parse_args()
+
+    db._connect = lambda: FakeConnection(args.query_ms)
+    modes = ["blocking", "offloaded"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        asyncio.run(run(mode, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main_cli()
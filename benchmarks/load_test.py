@@ -0,0 +1,343 @@
+"""엔드투엔드 부하 테스트.
+
+로컬 MySQL(.env 의 MYSQL_*)에 부하 테스트용 사용자/프로필/학습 기록/답변을 넣고, 실제 서버에
+학습 세션 트래픽(/login -> /learn/start -> N x /learn/step -> /learn/ai_report -> /statics)을
+보내 엔드포인트별 처리량과 p50/p95/p99 를 잰다. 결과는 benchmarks/results/ 에 JSON 으로 저장해
+리비전끼리 비교한다. AI 리포트는 openai_stub.py 가 대신 응답한다.
+
+사용법:
+  # 스키마 적용(기존 테이블을 지움, 빈 로컬 DB 에서만) + 데이터 생성
+  python benchmarks/load_test.py seed --schema --users 50 --profiles 2 --logs 20 --answers 10
+  # 스텁과 서버를 띄워 60초 동안 세션 20개를 동시에 실행
+  python benchmarks/load_test.py run --spawn --sessions 20 --steps 10 --duration 60 --label baseline
+  # 이미 떠 있는 서버(OPENAI_BASE_URL 이 스텁을 가리켜야 함)에 실행
+  python benchmarks/load_test.py run --base-url http://127.0.0.1:8000
+  # 두 결과 비교
+  python benchmarks/load_test.py compare benchmarks/results/a.json benchmarks/results/b.json
+(httpx 필요: pip install httpx)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, "..")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, ROOT_DIR)
+
+import httpx
+
+USER_PREFIX = "load_"
+PASSWORD = "load-password"
+
+
+# ---- 데이터 생성 ----
+
+def apply_schema(conn):
+    with open(os.path.join(ROOT_DIR, "edu_for_disabled_db.sql"), encoding="utf-8") as f:
+        lines = [line for line in f if not line.startswith("--")]
+    cursor = conn.cursor()
+    for statement in "".join(lines).split(";\n"):
+        if statement.strip():
+            cursor.execute(statement)
+    conn.commit()
+    cursor.close()
+
+
+def cleanup(conn):
+    pattern = USER_PREFIX + "%"
+    cursor = conn.cursor()
+    cursor.execute(
+        "DELETE st FROM statics st JOIN learning_logs l ON st.learning_log_id = l.learning_log_id "
+        "WHERE l.user_id LIKE %s", (pattern,)
+    )
+    cursor.execute("DELETE FROM profiles WHERE user_id LIKE %s", (pattern,))
+    cursor.execute("DELETE FROM users WHERE user_id LIKE %s", (pattern,))
+    conn.commit()
+    cursor.close()
+
+
+def seed(conn, num_users, num_profiles, num_logs, num_answers):
+    from passwords import pwd_context
+    from statics_rollup import rebuild
+
+    hashed = pwd_context.hash(PASSWORD)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT scenario_id, scene_cnt FROM scenario")
+    scenarios = cursor.fetchall()
+    if not scenarios:
+        for i in range(5):
+            cursor.execute("INSERT INTO scenario (title, scene_cnt) VALUES (%s, %s)",
+                           (f"load scenario {i}".encode(), 10))
+        cursor.execute("SELECT scenario_id, scene_cnt FROM scenario")
+        scenarios = cursor.fetchall()
+
+    start = datetime.now() - timedelta(days=90)
+    for u in range(num_users):
+        user_id = f"{USER_PREFIX}{u}"
+        cursor.execute("INSERT INTO users (user_id, password, user_name) VALUES (%s, %s, %s)",
+                       (user_id, hashed, user_id))
+        for p in range(num_profiles):
+            profile_name = f"p{p}"
+            cursor.execute("INSERT INTO profiles (user_id, profile_name, icon_url) VALUES (%s, %s, %s)",
+                           (user_id, profile_name, "load"))
+            for i in range(num_logs):
+                scenario_id, scene_cnt = random.choice(scenarios)
+                cursor.execute(
+                    "INSERT INTO learning_logs (scenario_id, user_id, profile_name, time, answer_cnt) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    (scenario_id, user_id, profile_name,
+                     start + timedelta(minutes=random.randint(0, 90 * 24 * 60)), num_answers),
+                )
+                log_id = cursor.lastrowid
+                cursor.executemany(
+                    "INSERT INTO answers (learning_log_id, sceneId, question, answer, response) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    [(log_id, str(a % scene_cnt + 1), "q", "a", "r") for a in range(num_answers)],
+                )
+        conn.commit()
+    cursor.close()
+    rebuild(conn)
+
+
+# ---- 트래픽 ----
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.sessions = 0
+
+    async def call(self, name, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        return response.json()
+
+
+async def session(client, recorder, deadline, args, scenario_ids):
+    while time.perf_counter() < deadline:
+        user_id = f"{USER_PREFIX}{random.randrange(args.users)}"
+        profile_name = f"p{random.randrange(args.profiles)}"
+
+        login = await recorder.call("/login", client.post(
+            "/login", json={"user_id": user_id, "password": PASSWORD}))
+        if login is None:
+            continue
+        started = await recorder.call("/learn/start", client.post("/learn/start", json={
+            "scenario_id": random.choice(scenario_ids), "user_id": user_id, "profile_name": profile_name,
+        }))
+        if started is None:
+            continue
+        learning_log_id = started["learning_log_id"]
+
+        for scene in range(1, args.steps + 1):
+            await recorder.call("/learn/step", client.post(
+                "/learn/step", params={"buffered": "true"} if args.buffered else None, json={
+                    "learning_log_id": learning_log_id, "sceneId": str(scene),
+                    "question": "q", "answer": "a", "response": "r",
+                }))
+        await recorder.call("/learn/ai_report", client.post(
+            "/learn/ai_report", json={"learning_log_id": learning_log_id}))
+        await recorder.call("/statics", client.get(
+            "/statics", params={"user_id": user_id, "profile_name": profile_name}))
+        recorder.sessions += 1
+
+
+def percentile(values, q):
+    return values[max(int(round(len(values) * q)) - 1, 0)]
+
+
+def summarize(recorder, duration):
+    endpoints = {}
+    for name, values in sorted(recorder.latencies.items()):
+        values.sort()
+        endpoints[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "rps": round(len(values) / duration, 2),
+            "p50_ms": round(statistics.median(values) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    total = sum(len(v) for v in recorder.latencies.values())
+    return {"requests": total, "rps": round(total / duration, 2),
+            "sessions": recorder.sessions, "endpoints": endpoints}
+
+
+def print_summary(result):
+    print(f"{result['requests']} requests, {result['rps']} req/s, {result['sessions']} sessions")
+    for name, e in result["endpoints"].items():
+        print(f"  {name:18s} n={e['count']:6d} err={e['errors']:4d} p50={e['p50_ms']:8.1f}ms "
+              f"p95={e['p95_ms']:8.1f}ms p99={e['p99_ms']:8.1f}ms")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def spawn(args):
+    env = dict(os.environ, OPENAI_STUB_DELAY=str(args.stub_delay))
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--app-dir", BENCH_DIR, "openai_stub:app",
+         "--port", str(args.stub_port), "--log-level", "warning"], env=env)
+    env = dict(os.environ, OPENAI_BASE_URL=f"http://127.0.0.1:{args.stub_port}/v1",
+               OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "stub"))
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"], cwd=ROOT_DIR, env=env)
+    return [stub, app]
+
+
+async def wait_ready(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/scenarios/catalog")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+
+def load_scenario_ids():
+    # 서버와 같은 로컬 DB 에서 시나리오 id 를 읽는다
+    import db
+    conn = db._connect()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT scenario_id FROM scenario")
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+async def run(args):
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.sessions)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await wait_ready(client)
+        scenario_ids = args.scenario_ids or load_scenario_ids()
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(session(client, recorder, deadline, args, scenario_ids)
+                               for _ in range(args.sessions)))
+        return summarize(recorder, time.perf_counter() - start)
+
+
+def cmd_seed(args):
+    import db
+    conn = db._connect()
+    try:
+        if args.schema:
+            apply_schema(conn)
+        cleanup(conn)
+        print(f"seeding {args.users} users x {args.profiles} profiles x {args.logs} logs x {args.answers} answers ...")
+        seed(conn, args.users, args.profiles, args.logs, args.answers)
+    finally:
+        conn.close()
+
+
+def cmd_run(args):
+    processes = spawn(args) if args.spawn else []
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    result.update({
+        "label": args.label,
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: getattr(args, key) for key in
+                   ("sessions", "steps", "duration", "users", "profiles", "buffered", "workers", "stub_delay")},
+    })
+    print_summary(result)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{args.label or result['revision']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"saved {path}")
+
+
+def cmd_compare(args):
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.other, encoding="utf-8") as f:
+        other = json.load(f)
+    print(f"{base.get('label') or base['revision']} -> {other.get('label') or other['revision']}")
+    print(f"  {'total':18s} rps {base['rps']:8.1f} -> {other['rps']:8.1f}")
+    for name in sorted(set(base["endpoints"]) | set(other["endpoints"])):
+        a, b = base["endpoints"].get(name), other["endpoints"].get(name)
+        if a is None or b is None:
+            print(f"  {name:18s} only in {'base' if b is None else 'other'}")
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            change = (b[key] - a[key]) / a[key] * 100 if a[key] else 0.0
+            cells.append(f"{key[:3]} {a[key]:7.1f} -> {b[key]:7.1f}ms ({change:+5.1f}%)")
+        print(f"  {name:18s} " + "  ".join(cells))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="부하 테스트 데이터 생성")
+    seed_parser.add_argument("--schema", action="store_true", help="edu_for_disabled_db.sql 을 먼저 적용 (기존 테이블 삭제)")
+    seed_parser.add_argument("--answers", type=int, default=10, help="학습 기록당 답변 수")
+    seed_parser.add_argument("--logs", type=int, default=20, help="프로필당 학습 기록 수")
+
+    run_parser = commands.add_parser("run", help="세션 트래픽 실행")
+    run_parser.add_argument("--base-url", help="이미 떠 있는 서버 주소 (없으면 --port 사용)")
+    run_parser.add_argument("--spawn", action="store_true", help="OpenAI 스텁과 서버를 직접 띄움")
+    run_parser.add_argument("--port", type=int, default=8000)
+    run_parser.add_argument("--workers", type=int, default=1, help="--spawn 시 uvicorn 워커 수")
+    run_parser.add_argument("--stub-port", type=int, default=9000)
+    run_parser.add_argument("--stub-delay", type=float, default=1.0, help="스텁 응답 지연(초)")
+    run_parser.add_argument("--sessions", type=int, default=20, help="동시에 실행할 세션 수")
+    run_parser.add_argument("--steps", type=int, default=10, help="세션당 /learn/step 호출 수")
+    run_parser.add_argument("--duration", type=float, default=60.0)
+    run_parser.add_argument("--buffered", action="store_true", help="/learn/step?buffered=true 사용")
+    run_parser.add_argument("--scenario-ids", type=int, nargs="*",
+                            help="사용할 scenario_id (없으면 DB 에서 읽음)")
+    run_parser.add_argument("--label", help="결과 파일 이름에 붙일 이름")
+
+    for sub in (seed_parser, run_parser):
+        sub.add_argument("--users", type=int, default=50)
+        sub.add_argument("--profiles", type=int, default=2, help="사용자당 프로필 수")
+
+    compare_parser = commands.add_parser("compare", help="두 결과 파일 비교")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("other")
+
+    args = parser.parse_args()
+    {"seed": cmd_seed, "run": cmd_run, "compare": cmd_compare}[args.command](args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,92 @@
+"""로그인 폭주 중 다른 엔드포인트(/statics) 지연 벤치마크.
+
+DB 는 concurrency.py 의 가짜 드라이버를 쓰고, 로그인 요청이 실제 bcrypt 검증을 하도록
+fetch_user_credentials 만 BCRYPT_ROUNDS 로 만든 해시를 돌려주게 바꾼다. 두 모드를 비교한다.
+
+  inline    : 이벤트 루프에서 bcrypt 를 직접 계산하던 이전 방식
+  offloaded : passwords 모듈의 전용 스레드 풀에서 계산하는 현재 방식
+
+사용법: python benchmarks/login_storm.py --logins 32 --duration 5
+(httpx 필요: pip install httpx)
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx
+
+import db
+import main
+import passwords
+from concurrency import FakeConnection
+
+PASSWORD = "bench-password"
+
+
+async def verify_password_inline(plain_password, hashed_password):
+    # 이전 방식: 이벤트 루프 스레드에서 그대로 계산
+    return passwords.pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def login_worker(client, deadline, counts):
+    while time.perf_counter() < deadline:
+        response = await client.post("/login", json={"user_id": "bench", "password": PASSWORD})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+
+async def probe(client, deadline, interval, latencies):
+    # 일정 간격으로 /statics 를 호출해 지연을 잰다
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/statics", params={"user_id": "u", "profile_name": "p"})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[max(int(len(values) * q) - 1, 0)]
+
+
+async def run(mode, logins, duration, interval):
+    main.verify_password = verify_password_inline if mode == "inline" else passwords.verify_password
+    counts = {}
+    latencies = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            probe(client, deadline, interval, latencies),
+            *(login_worker(client, deadline, counts) for _ in range(logins)),
+        )
+
+    print(f"[{mode}] logins {sum(counts.values()) / duration:.1f}/s {dict(sorted(counts.items()))}")
+    print(f"  /statics n={len(latencies):5d} p50={statistics.median(latencies) * 1000:8.1f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:8.1f}ms max={max(latencies) * 1000:8.1f}ms")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="동시에 로그인을 반복하는 클라이언트 수")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.01, help="/statics 호출 간격(초)")
+    parser.add_argument("--query-ms", type=float, default=1.0, help="가짜 쿼리 1건당 지연(ms)")
+    parser.add_argument("--mode", choices=["inline", "offloaded", "both"], default="both")
+    args = parser.parse_args()
+
+    hashed = passwords.pwd_context.hash(PASSWORD)
+    db._connect = lambda: FakeConnection(args.query_ms)
+    main.fetch_user_credentials = lambda conn, user_id: (hashed, "bench")
+    modes = ["inline", "offloaded"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        asyncio.run(run(mode, args.logins, args.duration, args.interval))
+
+
+if __name__ == "__main__":
+    main_cli()
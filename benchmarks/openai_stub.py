@@ -0,0 +1,105 @@
+"""OpenAI Chat Completions API 로컬 스텁.
+
+실제 모델 대신 고정된 리포트 JSON을 OPENAI_STUB_DELAY 초 뒤에 돌려준다.
+
+사용법:
+  uvicorn --app-dir benchmarks openai_stub:app --port 9000
+  OPENAI_BASE_URL=http://127.0.0.1:9000/v1 uvicorn main:app
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+app = FastAPI()
+
+STUB_DELAY = float(os.getenv("OPENAI_STUB_DELAY", 1.0))
+STUB_CHUNK_SIZE = 8  # 스트리밍 시 조각당 글자 수
+
+STUB_REPORT = {
+    "completed": "모든 문항에 시간 초과 없이 답했어요.",
+    "agile": "대부분의 문항에 빠르게 응답했어요.",
+    "accuracy": "모든 문항에 의도한 답을 골랐어요.",
+    "context": "상황에 맞게 감정을 잘 표현했어요.",
+    "pronunciation": "발음이 어색한 응답은 없었어요.",
+    "review": "전반적으로 잘 해냈어요. 다음에는 조금 더 긴 시나리오에 도전해 보세요.",
+    "correct_response_cnt": 5,
+    "timeout_response_cnt": 0,
+}
+
+# 호출 기록 (테스트에서 호출 횟수 확인용)
+calls = {"count": 0}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    calls["count"] += 1
+    content = json.dumps(STUB_REPORT, ensure_ascii=False)
+
+    if body.get("stream"):
+        return StreamingResponse(stream_chunks(body, content), media_type="text/event-stream")
+
+    await asyncio.sleep(STUB_DELAY)
+    prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+    completion_tokens = len(content) // 4
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+# stream=True 요청: STUB_DELAY 동안 나누어 조각을 보낸다
+async def stream_chunks(body, content):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    pieces = [content[i:i + STUB_CHUNK_SIZE] for i in range(0, len(content), STUB_CHUNK_SIZE)]
+
+    for i, piece in enumerate(pieces):
+        await asyncio.sleep(STUB_DELAY / len(pieces))
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": piece} if i == 0 else {"content": piece},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+    done = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(done)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/stub/calls")
+async def get_calls():
+    return calls
@@ -0,0 +1,207 @@
+"""/statics 집계 벤치마크: 이전 7-쿼리(IN 목록) 방식, 단일 쿼리 집계, 일자별 롤업 합산 비교.
+
+.env 의 MYSQL_* 로 접속하며, edu_for_disabled_db.sql 스키마가 올라가 있어야 한다.
+벤치마크용 사용자/프로필에 학습 기록과 답변(기본 100k 행)을 넣고, 끝나면 지운다(--keep 이면 유지).
+세 방식의 결과가 다르면 실패(종료 코드 1)하며, p50 결과는 benchmarks/results/ 에 JSON 으로 저장한다.
+
+사용법: python benchmarks/statics.py --answers 100000 --logs 2000 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi import HTTPException
+
+import db
+from main import fetch_statistics
+from statics_rollup import aggregate_statistics, rebuild, COUNTERS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+USER_ID = "bench_statics"
+PROFILE_NAME = "bench_statics"
+
+
+def legacy_fetch_statistics(conn, user_id, profile_name, start_date, end_date):
+    # 이전 구현: 학습 기록 id 목록을 읽은 뒤 IN 목록으로 6번 더 조회
+    cursor = conn.cursor(dictionary=True)
+    try:
+        query = """
+            SELECT learning_log_id, scenario_id
+            FROM edu_for_disabled.learning_logs
+            WHERE user_id = %s AND profile_name = %s
+        """
+        params = [user_id, profile_name]
+        if start_date and end_date:
+            query += " AND time BETWEEN %s AND %s"
+            params.extend([start_date, end_date])
+        cursor.execute(query, tuple(params))
+        ids = [row["learning_log_id"] for row in cursor.fetchall()]
+        if not ids:
+            raise HTTPException(status_code=404, detail="No learning logs found for the given criteria")
+        in_list = ",".join(["%s"] * len(ids))
+
+        queries = [
+            "SELECT COUNT(*) AS v FROM edu_for_disabled.answers WHERE learning_log_id IN (%s)",
+            """SELECT COUNT(*) AS v FROM (
+                   SELECT MAX(hash_num) FROM edu_for_disabled.answers
+                   WHERE learning_log_id IN (%s) GROUP BY learning_log_id, sceneId
+               ) AS latest_answers""",
+            """SELECT SUM(s.scene_cnt) AS v FROM edu_for_disabled.scenario s
+               JOIN edu_for_disabled.learning_logs l ON s.scenario_id = l.scenario_id
+               WHERE l.learning_log_id IN (%s)""",
+            """SELECT COUNT(*) AS v FROM edu_for_disabled.answers a WHERE a.learning_log_id IN (
+                   SELECT lr.learning_log_id FROM edu_for_disabled.learning_report lr
+                   WHERE lr.learning_log_id IN (%s))""",
+            "SELECT SUM(correct_response_cnt) AS v FROM edu_for_disabled.statics WHERE learning_log_id IN (%s)",
+            "SELECT SUM(timeout_response_cnt) AS v FROM edu_for_disabled.statics WHERE learning_log_id IN (%s)",
+        ]
+        names = ["whole_response_cnt", "responsed_question_cnt", "expected_question_cnt",
+                 "eval_response_cnt", "correct_response_cnt", "timeout_response_cnt"]
+        result = {}
+        for name, query in zip(names, queries):
+            cursor.execute(query % in_list, ids)
+            result[name] = int(cursor.fetchall()[0]["v"] or 0)
+        return result
+    finally:
+        cursor.close()
+
+
+def cleanup(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        "DELETE st FROM statics st JOIN learning_logs l ON st.learning_log_id = l.learning_log_id "
+        "WHERE l.user_id = %s", (USER_ID,)
+    )
+    cursor.execute("DELETE FROM profiles WHERE user_id = %s", (USER_ID,))
+    cursor.execute("DELETE FROM users WHERE user_id = %s", (USER_ID,))
+    conn.commit()
+    cursor.close()
+
+
+def seed(conn, num_logs, num_answers):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO users (user_id, password, user_name) VALUES (%s, %s, %s)",
+                   (USER_ID, "x" * 60, USER_ID))
+    cursor.execute("INSERT INTO profiles (user_id, profile_name, icon_url) VALUES (%s, %s, %s)",
+                   (USER_ID, PROFILE_NAME, "bench"))
+
+    cursor.execute("SELECT scenario_id FROM scenario")
+    scenario_ids = [row[0] for row in cursor.fetchall()]
+    if not scenario_ids:
+        cursor.execute("INSERT INTO scenario (title, scene_cnt) VALUES (%s, %s)", (b"bench", 10))
+        scenario_ids = [cursor.lastrowid]
+
+    start = datetime.now() - timedelta(days=365)
+    log_ids = []
+    for i in range(num_logs):
+        cursor.execute(
+            "INSERT INTO learning_logs (scenario_id, user_id, profile_name, time) VALUES (%s, %s, %s, %s)",
+            (random.choice(scenario_ids), USER_ID, PROFILE_NAME, start + timedelta(minutes=263 * i)),
+        )
+        log_ids.append(cursor.lastrowid)
+
+    rows = []
+    for i in range(num_answers):
+        rows.append((random.choice(log_ids), str(random.randint(1, 10)), "q", "a", "r"))
+        if len(rows) == 5000:
+            cursor.executemany(
+                "INSERT INTO answers (learning_log_id, sceneId, question, answer, response) "
+                "VALUES (%s, %s, %s, %s, %s)", rows)
+            rows = []
+    if rows:
+        cursor.executemany(
+            "INSERT INTO answers (learning_log_id, sceneId, question, answer, response) "
+            "VALUES (%s, %s, %s, %s, %s)", rows)
+
+    reported = log_ids[::2]
+    cursor.executemany(
+        "INSERT INTO learning_report (learning_log_id, completed, agile, accuracy, context, pronunciation, review) "
+        "VALUES (%s, '', '', '', '', '', '')", [(i,) for i in reported])
+    cursor.executemany(
+        "INSERT INTO statics (learning_log_id, correct_response_cnt, timeout_response_cnt) VALUES (%s, %s, %s)",
+        [(i, random.randint(0, 10), random.randint(0, 3)) for i in reported])
+    conn.commit()
+    cursor.close()
+
+
+def single_pass(conn, user_id, profile_name, start_date, end_date):
+    if start_date and end_date:
+        totals = aggregate_statistics(conn, user_id, profile_name, start_date, end_date)
+    else:
+        totals = aggregate_statistics(conn, user_id, profile_name)
+    return {name: totals[name] for name in COUNTERS if name != "learning_log_cnt"}
+
+
+def measure(conn, func, repeat, args):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(conn, *args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=2000)
+    parser.add_argument("--answers", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="벤치마크 데이터를 지우지 않음")
+    args = parser.parse_args()
+
+    conn = db._connect()
+    cleanup(conn)
+    print(f"seeding {args.logs} learning logs / {args.answers} answers ...")
+    seed(conn, args.logs, args.answers)
+    rebuild(conn, USER_ID, PROFILE_NAME)
+
+    results = {"logs": args.logs, "answers": args.answers, "repeat": args.repeat, "ranges": {}}
+    mismatch = False
+    try:
+        for label, start_date, end_date in [
+            ("all time", None, None),
+            ("last 30 days", (datetime.now() - timedelta(days=30)).isoformat(), datetime.now().isoformat()),
+        ]:
+            call_args = (USER_ID, PROFILE_NAME, start_date, end_date)
+            legacy, legacy_ms = measure(conn, legacy_fetch_statistics, args.repeat, call_args)
+            single, single_ms = measure(conn, single_pass, args.repeat, call_args)
+            rollup, rollup_ms = measure(conn, fetch_statistics, args.repeat, call_args)
+            # python -O 에서도 확인하도록 assert 대신 직접 비교
+            if not legacy == single == rollup:
+                mismatch = True
+                print(f"[{label}] MISMATCH legacy={legacy} single-pass={single} rollup={rollup}")
+            base = statistics.median(legacy_ms)
+            print(f"[{label}] legacy p50={base:8.1f}ms  "
+                  f"single-pass p50={statistics.median(single_ms):8.1f}ms ({base / statistics.median(single_ms):.1f}x)  "
+                  f"rollup p50={statistics.median(rollup_ms):8.1f}ms ({base / statistics.median(rollup_ms):.1f}x)")
+            results["ranges"][label] = {
+                "legacy_p50_ms": round(base, 2),
+                "single_pass_p50_ms": round(statistics.median(single_ms), 2),
+                "rollup_p50_ms": round(statistics.median(rollup_ms), 2),
+                "match": legacy == single == rollup,
+            }
+    finally:
+        if not args.keep:
+            cleanup(conn)
+        conn.close()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"statics-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"saved {path}")
+    if mismatch:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,189 @@
+from fastapi import HTTPException
+from mysql.connector import connect, Error
+from concurrent.futures import ThreadPoolExecutor
+from queue import LifoQueue, Empty
+from metrics import DB_CHECKOUT_SECONDS, DB_EXECUTOR_WAIT_SECONDS, DB_QUERY_SECONDS
+from slow_query import slow_query_log, query_context, TracingCursor
+import asyncio
+import threading
+import time
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 커넥션 풀 설정
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))              # 풀에 유지하는 연결 수
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))  # 피크 시 추가로 허용하는 연결 수
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))      # 빈 연결을 기다리는 최대 시간(초)
+POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", 3600))    # 이 시간(초)보다 오래된 연결은 새로 연결
+POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", 5))  # 이 시간(초) 이상 쉬던 연결은 꺼낼 때 ping 확인
+
+
+def _connect():
+    return connect(
+        host=os.getenv("MYSQL_HOST"),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=os.getenv("MYSQL_DATABASE"),
+    )
+
+
+class PooledConnection:
+    """풀에서 빌려온 연결. close()는 연결을 끊지 않고 풀에 반납한다."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise Error(msg="Connection already returned to pool")
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        if self._raw is None:
+            raise Error(msg="Connection already returned to pool")
+        cursor = self._raw.cursor(*args, **kwargs)
+        # 느린 쿼리 로그가 켜져 있으면 실행 시간을 재는 커서로 감싼다
+        return TracingCursor(cursor, slow_query_log) if slow_query_log.enabled else cursor
+
+    def close(self):
+        # 여러 번 호출해도 한 번만 반납
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        self._pool.release(raw, self._created_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, ping_after=POOL_PING_AFTER):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        # (연결, 생성 시각, 마지막 반납 시각). 최근에 쓴 연결부터 재사용
+        self._idle = LifoQueue()
+        # 동시에 빌려줄 수 있는 연결 수 = size + max_overflow
+        self._slots = threading.BoundedSemaphore(size + max_overflow)
+
+    def warm(self):
+        # 앱 시작 시 size 만큼 미리 연결
+        now = time.monotonic()
+        for _ in range(self.size - self._idle.qsize()):
+            try:
+                self._idle.put((_connect(), now, now))
+            except Error as e:
+                print(e)
+                break
+
+    def acquire(self):
+        started_at = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HTTPException(status_code=503, detail="DB 연결 대기 시간 초과")
+        try:
+            conn = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+        DB_CHECKOUT_SECONDS.observe(time.perf_counter() - started_at)
+        return conn
+
+    def _checkout(self):
+        while True:
+            try:
+                raw, created_at, last_used = self._idle.get_nowait()
+            except Empty:
+                break
+            now = time.monotonic()
+            if now - created_at > self.recycle:
+                self._discard(raw)
+                continue
+            if now - last_used > self.ping_after and not raw.is_connected():
+                self._discard(raw)
+                continue
+            return PooledConnection(self, raw, created_at)
+
+        try:
+            raw = _connect()
+        except Error as e:
+            print(e)
+            raise HTTPException(status_code=500, detail="DB 연결 실패")
+        return PooledConnection(self, raw, time.monotonic())
+
+    def release(self, raw, created_at):
+        try:
+            # 읽지 않은 결과나 커밋되지 않은 트랜잭션을 정리한 뒤 반납
+            if raw.unread_result:
+                raw.consume_results()
+            if raw.in_transaction:
+                raw.rollback()
+            if self._idle.qsize() < self.size:
+                self._idle.put((raw, created_at, time.monotonic()))
+            else:
+                self._discard(raw)
+        except Error:
+            self._discard(raw)
+        finally:
+            self._slots.release()
+
+    def dispose(self):
+        while True:
+            try:
+                raw, _, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            self._discard(raw)
+
+    @staticmethod
+    def _discard(raw):
+        try:
+            raw.close()
+        except Error:
+            pass
+
+
+db_pool = ConnectionPool()
+
+
+# MySQL 연결 (풀에서 대여, close() 시 반납)
+def get_db_connection():
+    return db_pool.acquire()
+
+
+# 블로킹 DB 호출 전용 스레드 풀. 풀이 빌려줄 수 있는 최대 연결 수만큼만 스레드를 둔다
+db_executor = ThreadPoolExecutor(
+    max_workers=POOL_SIZE + POOL_MAX_OVERFLOW, thread_name_prefix="db"
+)
+
+
+def _call_with_connection(func, args, queued_at=None):
+    started_at = time.perf_counter()
+    if queued_at is not None:
+        DB_EXECUTOR_WAIT_SECONDS.observe(started_at - queued_at)
+    # 쿼리 이름은 DB 함수 이름 (fetch_answers, insert_answers, ...)
+    name = getattr(func, "__name__", "unknown")
+    query_context.name = name
+    conn = get_db_connection()
+    try:
+        return func(conn, *args)
+    finally:
+        conn.close()
+        query_context.name = None
+        DB_QUERY_SECONDS.labels(name).observe(time.perf_counter() - started_at)
+
+
+# func(conn, *args)를 DB 스레드 풀에서 실행하고 결과를 돌려준다 (이벤트 루프를 막지 않음)
+async def run_db(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, _call_with_connection, func, args, time.perf_counter())
@@ -31,7 +31,7 @@ CREATE TABLE `answers` (
   `hash_num` int NOT NULL AUTO_INCREMENT,
   `response` varchar(50) NOT NULL,
   PRIMARY KEY (`hash_num`),
-  KEY `fk_learning_log_id` (`learning_log_id`),
+  KEY `idx_answers_log_scene` (`learning_log_id`,`sceneId`,`hash_num`),
   CONSTRAINT `fk_learning_log_id` FOREIGN KEY (`learning_log_id`) REFERENCES `learning_logs` (`learning_log_id`) ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=1382 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -67,6 +67,7 @@ CREATE TABLE `learning_list` (
   `user_id` varchar(20) NOT NULL,
   `profile_name` varchar(20) NOT NULL,
   `scenario_id` int NOT NULL,
+  PRIMARY KEY (`user_id`,`profile_name`,`scenario_id`),
   KEY `scenario_id` (`scenario_id`),
   KEY `fk_profile_user` (`user_id`,`profile_name`),
   KEY `fk_profile_name` (`profile_name`),
@@ -90,9 +91,11 @@ CREATE TABLE `learning_logs` (
   `user_id` varchar(20) NOT NULL,
   `profile_name` varchar(20) NOT NULL,
   `time` timestamp NOT NULL,
+  `answer_cnt` int NOT NULL DEFAULT '0',
   PRIMARY KEY (`learning_log_id`),
   KEY `scenario_id` (`scenario_id`),
   KEY `learning_logs_ibfk_1` (`user_id`,`profile_name`),
+  KEY `idx_learning_logs_profile_time` (`user_id`,`profile_name`,`time`,`learning_log_id`,`scenario_id`,`answer_cnt`),
   CONSTRAINT `learning_logs_ibfk_1` FOREIGN KEY (`user_id`, `profile_name`) REFERENCES `profiles` (`user_id`, `profile_name`) ON DELETE CASCADE,
   CONSTRAINT `learning_logs_ibfk_2` FOREIGN KEY (`scenario_id`) REFERENCES `scenario` (`scenario_id`) ON DELETE RESTRICT ON UPDATE RESTRICT
 ) ENGINE=InnoDB AUTO_INCREMENT=515 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -113,6 +116,7 @@ CREATE TABLE `learning_report` (
   `context` varchar(100) NOT NULL,
   `pronunciation` varchar(100) NOT NULL,
   `review` varchar(300) NOT NULL,
+  `fingerprint` char(64) DEFAULT NULL,
   PRIMARY KEY (`learning_log_id`),
   CONSTRAINT `fk_learning_report_log_id` FOREIGN KEY (`learning_log_id`) REFERENCES `learning_logs` (`learning_log_id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -168,6 +172,29 @@ CREATE TABLE `statics` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `statics_rollup`
+--
+
+DROP TABLE IF EXISTS `statics_rollup`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `statics_rollup` (
+  `user_id` varchar(20) NOT NULL,
+  `profile_name` varchar(20) NOT NULL,
+  `day` date NOT NULL,
+  `learning_log_cnt` int NOT NULL DEFAULT '0',
+  `whole_response_cnt` int NOT NULL DEFAULT '0',
+  `responsed_question_cnt` int NOT NULL DEFAULT '0',
+  `expected_question_cnt` int NOT NULL DEFAULT '0',
+  `eval_response_cnt` int NOT NULL DEFAULT '0',
+  `correct_response_cnt` int NOT NULL DEFAULT '0',
+  `timeout_response_cnt` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`user_id`,`profile_name`,`day`),
+  CONSTRAINT `fk_statics_rollup_profiles` FOREIGN KEY (`user_id`, `profile_name`) REFERENCES `profiles` (`user_id`, `profile_name`) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `users`
 --
@@ -1,74 +1,202 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import httpx
+import hashlib
+import json
 import os
+import time
 from dotenv import load_dotenv
-from json_parser import JsonParser
+from prompt_serializer import build_user_content
+from metrics import observe_openai
 
 load_dotenv()
-def AiReport(scenario_data, answers_data):
 
-    scenario_info = JsonParser(scenario_data)
-    answer_sheet = JsonParser(answers_data)
-
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-    response = client.chat.completions.create(
-        model="gpt-4o-2024-08-06",
-        messages=[
-            {
-                "role": "system",
-                "content": "Scenario metadata is entered as JSON input for the first term. The metadata contains the scenario title and the number of questions. After that, the answer sheet is entered. You evaluate the given learning outcomes in detail. Please answer each question in detail in a narrative form. If an incorrect answer is found, please explain the incorrect answer by specifying the scenario and the correct answer. The output is Korean by using 일상생활에서 자연스러운 높임말."
-            },
-            {
-                "role": "user",
-                "content": "[scenario info]:\n"+scenario_info.__str__()+"\n[answer sheet]:\n"+answer_sheet.__str__()
-            }
-        ],
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "learning_schema",
-                "schema": {
-                    "type": "object",
-                    "properties": {
-                        "completed": {
-                            "description": "[MAX_LENGTH=100] Did you complete all n questions well without Timeout? Please specify the total number of expected answers from [scenario info] and the actual number of input answers in the [answer sheet].",
-                            "type": "string"
-                        },
-                        "agile": {
-                            "description": "[MAX_LENGTH=100] Did it show a fast response speed?",
-                            "type": "string"
-                        },
-                        "accuracy": {
-                            "description": "[MAX_LENGTH=100] Did the questioner answer with the intended answer? How many correct answers? If there is a wrong answer, please specify and let me know.",
-                            "type": "string"
-                        },
-                        "context": {
-                            "description": "[MAX_LENGTH=100] Did you express yourself correctly in the situation of expressing your emotions? Please specify an answer that you think is awkward to express your emotions in each situation.",
-                            "type": "string"
-                        },
-                        "pronunciation": {
-                            "description": "[MAX_LENGTH=100] if there is a \"응답(소리내어 말하기)\", Please specify and let me know an answer that is recognized as mispronunciation or does not fit the situation.",
-                            "type": "string"
-                        },
-                        "review": {
-                            "description": "[MAX_LENGTH=300] A general review of this learning and suggestions for future learning directions",
-                            "type": "string"
-                        },
-                        "correct_response_cnt": {
-                            "description": "the number of correct answers",
-                            "type": "integer"
-                        },
-                        "timeout_response_cnt":  {
-                            "description": "the number of timeout(=시간 초과) or no-reply answers during recorded responses",
-                            "type": "integer"
-                        },
-                        "additionalProperties": False
-                    }
-                }
+# OpenAI 클라이언트 설정
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 120))                # 요청 전체 제한 시간(초)
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 10))  # 연결 제한 시간(초)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 20))    # 동시 연결 수 상한
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", 10))        # 유지하는 keep-alive 연결 수
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 2))             # 실패 시 재시도 횟수 (지수 백오프)
+
+MODEL = "gpt-4o-2024-08-06"
+
+SYSTEM_PROMPT = "Scenario metadata is entered as JSON input for the first term. The metadata contains the scenario title and the number of questions. After that, the answer sheet is entered: a header row followed by one JSON array per answer, where sec is the number of seconds the learner took to respond (since the previous answer, or since the start for the first one). You evaluate the given learning outcomes in detail. Please answer each question in detail in a narrative form. If an incorrect answer is found, please explain the incorrect answer by specifying the scenario and the correct answer. The output is Korean by using 일상생활에서 자연스러운 높임말."
+
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "learning_schema",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "completed": {
+                    "description": "[MAX_LENGTH=100] Did you complete all n questions well without Timeout? Please specify the total number of expected answers from [scenario info] and the actual number of input answers in the [answer sheet].",
+                    "type": "string"
+                },
+                "agile": {
+                    "description": "[MAX_LENGTH=100] Did it show a fast response speed?",
+                    "type": "string"
+                },
+                "accuracy": {
+                    "description": "[MAX_LENGTH=100] Did the questioner answer with the intended answer? How many correct answers? If there is a wrong answer, please specify and let me know.",
+                    "type": "string"
+                },
+                "context": {
+                    "description": "[MAX_LENGTH=100] Did you express yourself correctly in the situation of expressing your emotions? Please specify an answer that you think is awkward to express your emotions in each situation.",
+                    "type": "string"
+                },
+                "pronunciation": {
+                    "description": "[MAX_LENGTH=100] if there is a \"응답(소리내어 말하기)\", Please specify and let me know an answer that is recognized as mispronunciation or does not fit the situation.",
+                    "type": "string"
+                },
+                "review": {
+                    "description": "[MAX_LENGTH=300] A general review of this learning and suggestions for future learning directions",
+                    "type": "string"
+                },
+                "correct_response_cnt": {
+                    "description": "the number of correct answers",
+                    "type": "integer"
+                },
+                "timeout_response_cnt":  {
+                    "description": "the number of timeout(=시간 초과) or no-reply answers during recorded responses",
+                    "type": "integer"
+                },
+                "additionalProperties": False
             }
         }
-    )
+    }
+}
+
+# 모델/프롬프트/스키마가 바뀌면 달라지는 버전 값 (리포트 캐시 키에 포함)
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps([MODEL, SYSTEM_PROMPT, RESPONSE_FORMAT], sort_keys=True, ensure_ascii=False).encode()
+).hexdigest()[:16]
+
+
+# 프로세스 전체에서 공유하는 클라이언트 (keep-alive, TLS 세션 재사용)
+_client = None
+_async_client = None
+
+
+def _timeout():
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def _limits():
+    return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_KEEPALIVE)
+
+
+def get_client():
+    global _client
+    if _client is None:
+        # OPENAI_BASE_URL 로 로컬 스텁 서버를 가리킬 수 있다
+        _client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL"),
+            max_retries=OPENAI_MAX_RETRIES,
+            timeout=_timeout(),
+            http_client=httpx.Client(limits=_limits(), timeout=_timeout()),
+        )
+    return _client
+
+
+def get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL"),
+            max_retries=OPENAI_MAX_RETRIES,
+            timeout=_timeout(),
+            http_client=httpx.AsyncClient(limits=_limits(), timeout=_timeout()),
+        )
+    return _async_client
+
+
+# 앱 시작 시 호출 (동기 클라이언트는 AiReport 를 처음 호출할 때 만든다)
+def init_clients():
+    get_async_client()
+
+
+# 앱 종료 시 호출
+async def close_clients():
+    global _client, _async_client
+    if _client is not None:
+        _client.close()
+        _client = None
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+
+
+def build_messages(scenario_data, answers_data):
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": build_user_content(scenario_data, answers_data)
+        }
+    ]
+
+
+def AiReport(scenario_data, answers_data):
+
+    started_at = time.perf_counter()
+    try:
+        response = get_client().chat.completions.create(
+            model=MODEL,
+            messages=build_messages(scenario_data, answers_data),
+            response_format=RESPONSE_FORMAT
+        )
+    except Exception:
+        observe_openai("sync", "error", started_at)
+        raise
+    observe_openai("sync", "ok", started_at, response.usage)
+
+    return response.choices[0].message.content
+
+
+# 이벤트 루프를 막지 않는 비동기 버전
+async def AiReportAsync(scenario_data, answers_data):
+
+    started_at = time.perf_counter()
+    try:
+        response = await get_async_client().chat.completions.create(
+            model=MODEL,
+            messages=build_messages(scenario_data, answers_data),
+            response_format=RESPONSE_FORMAT
+        )
+    except Exception:
+        observe_openai("async", "error", started_at)
+        raise
+    observe_openai("async", "ok", started_at, response.usage)
+
+    return response.choices[0].message.content
+
+
+# 모델 출력을 토큰이 도착하는 대로 조각(str) 단위로 돌려주는 스트리밍 버전
+async def AiReportStream(scenario_data, answers_data):
+
+    started_at = time.perf_counter()
+    usage = None
+    try:
+        stream = await get_async_client().chat.completions.create(
+            model=MODEL,
+            messages=build_messages(scenario_data, answers_data),
+            response_format=RESPONSE_FORMAT,
+            stream=True,
+            # 마지막 조각에 토큰 사용량을 받는다
+            stream_options={"include_usage": True}
+        )
 
-    # print(response.choices[0].message.content);
-    # Placeholder logic - replace with your AI processing logic
-    return response.choices[0].message.content
\ No newline at end of file
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception:
+        observe_openai("stream", "error", started_at, usage)
+        raise
+    observe_openai("stream", "ok", started_at, usage)
@@ -0,0 +1,197 @@
+from fastapi.responses import StreamingResponse
+from mysql.connector import Error
+from datetime import datetime
+from decimal import Decimal
+from db import db_pool, db_executor
+from scenario_catalog import scenario_catalog
+from statics_rollup import rollup_statistics, COUNTERS
+import asyncio
+import csv
+import io
+import json
+import zlib
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 학습 기록 내보내기 설정
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 500))          # 한 번에 서버에서 읽는 행 수
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", 2))    # 동시에 진행할 수 있는 내보내기 수 (연결을 계속 점유)
+
+# (레코드 종류, 쿼리, 컬럼). 모두 (user_id, profile_name) 로 조회
+SECTIONS = [
+    ("log", """
+        SELECT l.learning_log_id, l.scenario_id, l.time, l.answer_cnt
+        FROM edu_for_disabled.learning_logs l
+        WHERE l.user_id = %s AND l.profile_name = %s
+        ORDER BY l.time, l.learning_log_id
+    """, ["learning_log_id", "scenario_id", "scenario_title", "time", "answer_cnt"]),
+    ("answer", """
+        SELECT a.learning_log_id, a.hash_num, a.sceneId, a.question, a.answer, a.response, a.time
+        FROM edu_for_disabled.learning_logs l
+        JOIN edu_for_disabled.answers a ON a.learning_log_id = l.learning_log_id
+        WHERE l.user_id = %s AND l.profile_name = %s
+        ORDER BY a.learning_log_id, a.hash_num
+    """, ["learning_log_id", "hash_num", "sceneId", "question", "answer", "response", "time"]),
+    ("report", """
+        SELECT lr.learning_log_id, lr.completed, lr.agile, lr.accuracy, lr.context, lr.pronunciation, lr.review
+        FROM edu_for_disabled.learning_logs l
+        JOIN edu_for_disabled.learning_report lr ON lr.learning_log_id = l.learning_log_id
+        WHERE l.user_id = %s AND l.profile_name = %s
+        ORDER BY lr.learning_log_id
+    """, ["learning_log_id", "completed", "agile", "accuracy", "context", "pronunciation", "review"]),
+    ("statics", """
+        SELECT st.learning_log_id, st.correct_response_cnt, st.timeout_response_cnt
+        FROM edu_for_disabled.learning_logs l
+        JOIN edu_for_disabled.statics st ON st.learning_log_id = l.learning_log_id
+        WHERE l.user_id = %s AND l.profile_name = %s
+        ORDER BY st.learning_log_id
+    """, ["learning_log_id", "correct_response_cnt", "timeout_response_cnt"]),
+]
+
+# CSV 는 모든 종류의 컬럼을 합친 한 가지 헤더를 쓴다 (해당 없는 칸은 비움)
+CSV_COLUMNS = ["type"]
+for _, _, _columns in SECTIONS:
+    CSV_COLUMNS += [column for column in _columns if column not in CSV_COLUMNS]
+CSV_COLUMNS += [column for column in COUNTERS if column not in CSV_COLUMNS]
+
+_active = 0
+
+
+def _plain(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value)
+    return value
+
+
+def iter_export_rows(conn, user_id, profile_name):
+    """(레코드 종류, 행 목록) 을 EXPORT_BATCH_SIZE 단위로 돌려주는 제너레이터.
+
+    기본(unbuffered) 커서로 서버에서 조금씩 읽으므로 기록이 많아도 메모리 사용량이 일정하다.
+    한 연결에서 순서대로 실행하므로 다음 구역은 앞 구역의 결과를 다 읽은 뒤 시작한다.
+    """
+    # 시나리오 제목은 커서를 열기 전에 읽어 둔 카탈로그로 찾는다
+    # (결과를 다 읽기 전의 연결에서 카탈로그를 다시 읽으면 "Unread result found")
+    scenarios = scenario_catalog.snapshot(conn)
+    for record_type, query, _ in SECTIONS:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, (user_id, profile_name))
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                if record_type == "log":
+                    for row in rows:
+                        scenario = scenarios.get(row["scenario_id"])
+                        row["scenario_title"] = scenario["title"] if scenario else None
+                yield record_type, [{key: _plain(value) for key, value in row.items()} for row in rows]
+        finally:
+            cursor.close()
+
+    # 마지막 줄: 프로필 전체 통계 (/statics 와 같은 값)
+    totals = rollup_statistics(conn, user_id, profile_name)
+    yield "summary", [{key: _plain(value) for key, value in totals.items()}]
+
+
+def format_ndjson(record_type, rows):
+    return "".join(json.dumps({"type": record_type, **row}, ensure_ascii=False) + "\n" for row in rows)
+
+
+def format_csv(record_type, rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, lineterminator="\n")
+    for row in rows:
+        writer.writerow({"type": record_type, **row})
+    return buffer.getvalue()
+
+
+def csv_header():
+    return ",".join(CSV_COLUMNS) + "\n"
+
+
+def _close(rows, conn):
+    try:
+        rows.close()
+    except Error:
+        # 중간에 끊긴 경우 읽지 않은 결과는 풀 반납 시 정리된다
+        pass
+    conn.close()
+
+
+# 호출자가 reserve_export() 로 잡은 자리(slot)를 넘기며, 끝나면 자리를 돌려준다
+async def stream_export(slot, user_id, profile_name, fmt, compress):
+    loop = asyncio.get_running_loop()
+    encoder = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    formatter = format_csv if fmt == "csv" else format_ndjson
+
+    def encode(text):
+        data = text.encode("utf-8")
+        return encoder.compress(data) if encoder else data
+
+    conn = None
+    rows = None
+    try:
+        # 연결과 커서는 내보내기가 끝날 때까지 한 연결을 쓰며, 읽기는 DB 스레드에서 한다
+        conn = await loop.run_in_executor(db_executor, db_pool.acquire)
+        rows = iter_export_rows(conn, user_id, profile_name)
+        if fmt == "csv":
+            yield encode(csv_header())
+        while True:
+            batch = await loop.run_in_executor(db_executor, next, rows, None)
+            if batch is None:
+                break
+            chunk = encode(formatter(*batch))
+            if chunk:
+                yield chunk
+        if encoder:
+            yield encoder.flush()
+    finally:
+        slot.release()
+        if conn is not None:
+            await loop.run_in_executor(db_executor, _close, rows, conn)
+
+
+class ExportSlot:
+    """reserve_export() 로 잡은 내보내기 자리. 여러 곳에서 release() 해도 한 번만 돌려준다."""
+
+    def __init__(self):
+        self.released = False
+
+    def release(self):
+        global _active
+        if not self.released:
+            self.released = True
+            _active -= 1
+
+
+def reserve_export():
+    # 확인과 증가 사이에 await 가 없으므로 동시에 온 요청이 함께 통과하지 않는다
+    global _active
+    if _active >= EXPORT_MAX_CONCURRENT:
+        return None
+    _active += 1
+    return ExportSlot()
+
+
+class ExportResponse(StreamingResponse):
+    """응답이 어떻게 끝나든 자리를 돌려주는 StreamingResponse.
+
+    본문 제너레이터가 시작되기 전에 클라이언트가 끊기면 제너레이터의 finally 가 실행되지 않는다.
+    """
+
+    def __init__(self, slot, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
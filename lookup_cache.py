@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import json
+import time
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 조회 캐시 설정
+LOOKUP_CACHE_BACKEND = os.getenv("LOOKUP_CACHE_BACKEND", "local")     # local | redis
+LOOKUP_CACHE_REDIS_URL = os.getenv("LOOKUP_CACHE_REDIS_URL", "redis://localhost:6379/0")
+LOOKUP_CACHE_SIZE = int(os.getenv("LOOKUP_CACHE_SIZE", 10000))        # local 백엔드 최대 항목 수
+LOOKUP_CACHE_TTL = float(os.getenv("LOOKUP_CACHE_TTL", 600))          # 항목 유효 시간(초)
+
+
+class LocalBackend:
+    """프로세스 내 LRU 저장소. 공유 백엔드와 같은 인터페이스(get/set/delete)를 가진다."""
+
+    def __init__(self, max_size=LOOKUP_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()   # key -> (저장 시각, 값)
+        self.evictions = 0
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key, value, ttl):
+        # ttl 은 ReadThroughCache 가 읽을 때 확인한다
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key):
+        self._entries.pop(key, None)
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """여러 워커가 함께 쓰는 Redis 저장소 (redis 패키지 필요). 값은 JSON 으로 저장한다."""
+
+    def __init__(self, url=LOOKUP_CACHE_REDIS_URL):
+        import redis.asyncio as redis
+        self._client = redis.from_url(url)
+        self.evictions = 0  # 만료/축출은 Redis 가 관리
+
+    async def get(self, key):
+        raw = await self._client.get(key)
+        if raw is None:
+            return None
+        stored_at, value = json.loads(raw)
+        return stored_at, value
+
+    async def set(self, key, value, ttl):
+        await self._client.set(key, json.dumps([time.time(), value], default=str), ex=max(int(ttl), 1))
+
+    async def delete(self, key):
+        await self._client.delete(key)
+
+    def size(self):
+        return None
+
+
+def make_backend(name=LOOKUP_CACHE_BACKEND):
+    if name == "redis":
+        return RedisBackend()
+    return LocalBackend()
+
+
+class ReadThroughCache:
+    """조회 결과를 백엔드에 두고, 없으면 loader 로 읽어 채운다.
+
+    쓰기 엔드포인트는 DB 반영 후 invalidate 를 호출한다. 읽는 도중 무효화가 일어나면
+    (무효화 전 값일 수 있으므로) 읽은 값을 저장하지 않는다.
+    """
+
+    def __init__(self, name, backend=None, ttl=LOOKUP_CACHE_TTL):
+        self.name = name
+        self.backend = backend if backend is not None else make_backend()
+        self.ttl = ttl
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.skipped_stores = 0
+        self.served_age_total = 0.0
+        self.served_age_max = 0.0
+
+    def _key(self, parts):
+        return ":".join([self.name, *map(str, parts)])
+
+    async def get(self, parts, loader):
+        key = self._key(parts)
+        entry = await self.backend.get(key)
+        now = time.time()
+        if entry is not None and now - entry[0] <= self.ttl:
+            age = now - entry[0]
+            self.hits += 1
+            self.served_age_total += age
+            self.served_age_max = max(self.served_age_max, age)
+            return entry[1]
+
+        self.misses += 1
+        epoch = self._epoch
+        value = await loader()
+        if epoch == self._epoch:
+            await self.backend.set(key, value, self.ttl)
+        else:
+            self.skipped_stores += 1
+        return value
+
+    async def invalidate(self, parts):
+        self._epoch += 1
+        self.invalidations += 1
+        await self.backend.delete(self._key(parts))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.backend.evictions,
+            "skipped_stores": self.skipped_stores,
+            # 적중 시 돌려준 값이 캐시에 들어간 뒤 지난 시간
+            "avg_served_age_seconds": round(self.served_age_total / self.hits, 3) if self.hits else 0.0,
+            "max_served_age_seconds": round(self.served_age_max, 3),
+        }
+
+
+profile_cache = ReadThroughCache("profiles")
+character_cache = ReadThroughCache("character")
@@ -1,39 +1,76 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
-from pydantic import BaseModel
-from mysql.connector import connect, Error
-from passlib.context import CryptContext
+from fastapi import FastAPI, HTTPException, Depends, Query, Response, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from mysql.connector import Error
 import os
 from dotenv import load_dotenv
-from authtoken import verify_token, create_access_token
+from authtoken import verify_token, create_access_token, revoke_token, token_cache, oauth2_scheme
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime
 from typing import List, Optional
-from gpt import AiReport
+from gpt import AiReportAsync, AiReportStream, init_clients, close_clients
+from db import db_pool, db_executor, run_db
+from answer_buffer import AnswerBuffer
+from report_jobs import ReportJobQueue
+from report_cache import report_fingerprint, report_cache_stats
+from statics_rollup import rollup_statistics, record_learning_start, record_answers, record_report
+from scenario_catalog import scenario_catalog
+from passwords import hash_password, verify_password, password_executor
+from lookup_cache import profile_cache, character_cache
+from metrics import MetricsMiddleware, render_metrics, CONTENT_TYPE_LATEST, LEARNING_SESSIONS
+from slow_query import slow_query_log
+from migrate import apply_migrations, MIGRATE_ON_STARTUP
+from history_export import stream_export, reserve_export, ExportResponse
+import asyncio
+import base64
+import hashlib
 import json
+import re
+import time
 
 # 환경 변수 로드
 load_dotenv()
 
+# 완료된 AI 리포트 응답의 브라우저 캐시 시간(초)
+REPORT_CACHE_MAX_AGE = int(os.getenv("REPORT_CACHE_MAX_AGE", 3600))
+# 학습 세션(WebSocket)에서 이 시간(초) 동안 메시지가 없으면 세션 종료
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", 600))
+
 # FastAPI 앱 인스턴스 생성
 app = FastAPI()
-
-# 비밀번호 해시 설정
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-# MySQL 연결 설정
-def get_db_connection():
+app.add_middleware(MetricsMiddleware)
+
+# 앱 시작 시 DB 커넥션 풀 예열 및 백그라운드 작업 시작
+@app.on_event("startup")
+async def startup():
+    db_pool.warm()
+    if MIGRATE_ON_STARTUP:
+        # 마이그레이션 오류는 그대로 올려 시작을 멈춘다 (스키마가 맞지 않으면 모든 기록이 실패)
+        try:
+            await run_db(apply_migrations)
+        except HTTPException as e:
+            # DB 에 연결할 수 없을 때만 건너뛴다 (다음 시작 때 또는 migrate.py 로 적용)
+            print(f"Skipping migrations: {e.detail}")
     try:
-        connection = connect(
-            host=os.getenv("MYSQL_HOST"),
-            user=os.getenv("MYSQL_USER"),
-            password=os.getenv("MYSQL_PASSWORD"),
-            database=os.getenv("MYSQL_DATABASE"),
-        )
-        return connection
-    except Error as e:
+        await run_db(scenario_catalog.load)
+    except (Error, HTTPException) as e:
+        # DB 에 연결할 수 없어도 시작하고, 첫 조회 때 다시 읽는다
         print(e)
-        raise HTTPException(status_code=500, detail="DB 연결 실패")
+    init_clients()
+    answer_buffer.start()
+    report_jobs.start()
+
+
+# 앱 종료 시 리포트 작업을 멈추고 버퍼에 남은 답변을 기록한 뒤 풀의 연결 정리
+@app.on_event("shutdown")
+async def shutdown():
+    await report_jobs.stop()
+    await close_clients()
+    await answer_buffer.stop()
+    password_executor.shutdown(wait=True)
+    db_executor.shutdown(wait=True)
+    slow_query_log.close()
+    db_pool.dispose()
 
 # 모델 정의
 class UserRegister(BaseModel):
@@ -71,6 +108,27 @@ class StepDataRequest(BaseModel):
     answer: str
     response: str
 
+# 학습 세션(WebSocket) step 메시지 모델
+class SessionStepMessage(BaseModel):
+    seq: Optional[int] = None
+    sceneId: str
+    question: str
+    answer: str
+    response: str
+
+# 학습 기록 일괄 API 입력 모델 (항목의 learning_log_id 는 생략하면 요청의 값을 사용)
+class BulkStepItem(BaseModel):
+    learning_log_id: Optional[int] = None
+    sceneId: str
+    question: str
+    answer: str
+    response: str
+
+
+class BulkStepDataRequest(BaseModel):
+    learning_log_id: int
+    steps: List[BulkStepItem]
+
 # 반환 모델 정의
 class LearningLogResponse(BaseModel):
     learning_log_id: int
@@ -122,65 +180,98 @@ class RemoveLearningListRequest(BaseModel):
 class AIReportRequest(BaseModel):
     learning_log_id: int
 
-# 비밀번호 해싱
-def hash_password(password: str):
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# 회원가입 엔드포인트
+def insert_user(conn, user_id, hashed_pw, user_name):
+    cursor = conn.cursor()
+    query = "INSERT INTO users (user_id, password, user_name) VALUES (%s, %s, %s)"
+    try:
+        cursor.execute(query, (user_id, hashed_pw, user_name))
+        conn.commit()
+    finally:
+        cursor.close()
 
 
-# 회원가입 엔드포인트
 @app.post("/register")
 async def register(user: UserRegister):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password(user.password)
 
-    query = "INSERT INTO users (user_id, password, user_name) VALUES (%s, %s, %s)"
     try:
-        cursor.execute(query, (user.user_id, hashed_pw, user.user_name))
-        conn.commit()
+        await run_db(insert_user, user.user_id, hashed_pw, user.user_name)
     except Error as e:
         raise HTTPException(status_code=400, detail="User already exists")
-    finally:
-        cursor.close()
-        conn.close()
 
     return {"message": "User registered successfully"}
 
 
 # 로그인 엔드포인트
-@app.post("/login")
-async def login(user: UserLogin):
-    conn = get_db_connection()
+def fetch_user_credentials(conn, user_id):
     cursor = conn.cursor()
     query = "SELECT password, user_name FROM users WHERE user_id = %s"
+    try:
+        cursor.execute(query, (user_id,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
 
-    cursor.execute(query, (user.user_id,))
-    result = cursor.fetchone()
+def update_password_hash(conn, user_id, hashed_pw):
+    cursor = conn.cursor()
+    query = "UPDATE users SET password = %s WHERE user_id = %s"
+    try:
+        cursor.execute(query, (hashed_pw, user_id))
+        conn.commit()
+    finally:
+        cursor.close()
 
-    if not result or not verify_password(user.password, result[0]):
+
+@app.post("/login")
+async def login(user: UserLogin):
+    result = await run_db(fetch_user_credentials, user.user_id)
+    if not result:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    valid, new_hash = await verify_password(user.password, result[0])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # 저장된 해시의 cost 가 현재 설정과 다르면 새 해시로 교체 (실패해도 로그인은 진행)
+    if new_hash:
+        try:
+            await run_db(update_password_hash, user.user_id, new_hash)
+        except Error as e:
+            print(f"password rehash failed for {user.user_id}: {e}")
+
     # 유효한 사용자일 경우 JWT 토큰 생성
     access_token = create_access_token(data={"sub": user.user_id})
     return {"user_name": result[1], "access_token": access_token, "token_type": "bearer"}
 
 
+# 로그아웃 엔드포인트 (토큰 폐기)
+@app.post("/logout")
+async def logout(token: str = Depends(oauth2_scheme)):
+    revoke_token(token)
+    return {"message": "Logged out successfully"}
+
+
+@app.get("/auth/token_cache")
+async def get_token_cache_stats():
+    return token_cache.stats()
+
+
 # 프로필 조회 엔드포인트
-@app.get("/profiles/get/")
-async def get_profiles(user_id: str):
-    conn = get_db_connection()
+def fetch_profiles(conn, user_id):
     cursor = conn.cursor(dictionary=True)
     query = "SELECT profile_name, icon_url FROM profiles WHERE user_id = %s"
+    try:
+        cursor.execute(query, (user_id,))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
 
-    cursor.execute(query, (user_id,))
-    profiles = cursor.fetchall()
 
-    cursor.close()
-    conn.close()
+@app.get("/profiles/get/")
+async def get_profiles(user_id: str):
+    profiles = await profile_cache.get((user_id,), lambda: run_db(fetch_profiles, user_id))
 
     if not profiles:
         raise HTTPException(status_code=404, detail="No profiles found for this user")
@@ -189,144 +280,408 @@ async def get_profiles(user_id: str):
 
 
 # 프로필 설정/생성 엔드포인트
-@app.post("/profiles/set/")
-async def set_profile(profile_data: ProfileSetRequest):
-    conn = get_db_connection()
+def upsert_profile(conn, user_id, profile_name, icon_url):
     cursor = conn.cursor()
+    try:
+        query_check = "SELECT * FROM profiles WHERE user_id = %s AND profile_name = %s"
+        cursor.execute(query_check, (user_id, profile_name))
+        existing_profile = cursor.fetchone()
+
+        if existing_profile:
+            # 프로필이 존재하면 업데이트
+            query_update = "UPDATE profiles SET icon_url = %s WHERE user_id = %s AND profile_name = %s"
+            cursor.execute(query_update, (icon_url, user_id, profile_name))
+        else:
+            # 프로필이 없으면 새로 생성
+            query_insert = "INSERT INTO profiles (user_id, profile_name, icon_url) VALUES (%s, %s, %s)"
+            cursor.execute(query_insert, (user_id, profile_name, icon_url))
 
-    query_check = "SELECT * FROM profiles WHERE user_id = %s AND profile_name = %s"
-    cursor.execute(query_check, (profile_data.user_id, profile_data.profile_name))
-    existing_profile = cursor.fetchone()
+        conn.commit()
+    finally:
+        cursor.close()
 
-    if existing_profile:
-        # 프로필이 존재하면 업데이트
-        query_update = "UPDATE profiles SET icon_url = %s WHERE user_id = %s AND profile_name = %s"
-        cursor.execute(query_update, (profile_data.icon_url, profile_data.user_id, profile_data.profile_name))
-    else:
-        # 프로필이 없으면 새로 생성
-        query_insert = "INSERT INTO profiles (user_id, profile_name, icon_url) VALUES (%s, %s, %s)"
-        cursor.execute(query_insert, (profile_data.user_id, profile_data.profile_name, profile_data.icon_url))
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+@app.post("/profiles/set/")
+async def set_profile(profile_data: ProfileSetRequest):
+    await run_db(upsert_profile, profile_data.user_id, profile_data.profile_name, profile_data.icon_url)
+    await profile_cache.invalidate((profile_data.user_id,))
 
     return {"message": "Profile set successfully"}
 
 
 # 프로필 삭제 엔드포인트
-@app.delete("/profiles/rm/")
-async def remove_profile(profile_data: ProfileRemoveRequest):
-    conn = get_db_connection()
+def delete_profile(conn, user_id, profile_name):
     cursor = conn.cursor()
+    try:
+        query = "DELETE FROM profiles WHERE user_id = %s AND profile_name = %s"
+        cursor.execute(query, (user_id, profile_name))
+
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Profile not found")
 
-    query = "DELETE FROM profiles WHERE user_id = %s AND profile_name = %s"
-    cursor.execute(query, (profile_data.user_id, profile_data.profile_name))
+        conn.commit()
+    finally:
+        cursor.close()
 
-    if cursor.rowcount == 0:
-        raise HTTPException(status_code=404, detail="Profile not found")
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+@app.delete("/profiles/rm/")
+async def remove_profile(profile_data: ProfileRemoveRequest):
+    await run_db(delete_profile, profile_data.user_id, profile_data.profile_name)
+    # 캐릭터는 프로필 삭제 시 함께 지워진다 (ON DELETE CASCADE)
+    await profile_cache.invalidate((profile_data.user_id,))
+    await character_cache.invalidate((profile_data.user_id, profile_data.profile_name))
 
     return {"message": "Profile removed successfully"}
 
 # 학습 시작 API
-@app.post("/learn/start")
-async def start_learning(request: StartLearningRequest):
-    conn = get_db_connection()
+def insert_learning_log(conn, scenario_id, user_id, profile_name, current_time):
     cursor = conn.cursor()
-
     query = """
         INSERT INTO learning_logs (scenario_id, user_id, profile_name, time)
         VALUES (%s, %s, %s, %s)
     """
+    try:
+        cursor.execute(query, (scenario_id, user_id, profile_name, current_time))
+        learning_log_id = cursor.lastrowid
+        record_learning_start(conn, learning_log_id)
+        conn.commit()
+        return learning_log_id
+    finally:
+        cursor.close()
+
+
+@app.post("/learn/start")
+async def start_learning(request: StartLearningRequest):
     current_time = datetime.now()
 
     try:
-        cursor.execute(query, (request.scenario_id, request.user_id, request.profile_name, current_time))
-        conn.commit()
-        learning_log_id = cursor.lastrowid
+        learning_log_id = await run_db(
+            insert_learning_log, request.scenario_id, request.user_id, request.profile_name, current_time
+        )
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Failed to create learning log record: {e}")
-    finally:
-        cursor.close()
-        conn.close()
 
     return {"learning_log_id": learning_log_id}
 
 # 학습 기록 API
+def insert_answer(conn, learning_log_id, sceneId, question, answer, response):
+    insert_answers(conn, [(learning_log_id, sceneId, question, answer, response, datetime.now())])
+
+
 @app.post("/learn/step")
-async def log_step_data(request: StepDataRequest):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+async def log_step_data(request: StepDataRequest, buffered: bool = False):
+    row = (request.learning_log_id, request.sceneId, request.question, request.answer, request.response)
 
-    query = """
-        INSERT INTO answers (learning_log_id, sceneId, question, answer, response)
-        VALUES (%s, %s, %s, %s, %s)
-    """
+    # buffered=true 이면 즉시 응답하고 write-behind 버퍼에서 모아서 기록
+    if buffered:
+        answer_buffer.enqueue(row)
+        return {"message": "Step data queued successfully"}
 
     try:
-        cursor.execute(query, (request.learning_log_id, request.sceneId, request.question, request.answer, request.response))
-        conn.commit()
+        await run_db(insert_answer, *row)
     except Error as e:
         raise HTTPException(status_code=500, detail="Failed to log step data")
+
+    return {"message": "Step data recorded successfully"}
+
+# 학습 기록 일괄 API
+# rows = [(learning_log_id, sceneId, question, answer, response, time), ...]
+# time 은 답변을 받은 시각 (버퍼에서 모아 기록해도 기록 시각이 아닌 받은 시각이 남도록)
+def insert_answers(conn, rows):
+    cursor = conn.cursor()
+    # INSERT ... VALUES 의 executemany 는 하나의 multi-row INSERT 로 전송된다
+    query = """
+        INSERT INTO answers (learning_log_id, sceneId, question, answer, response, time)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    try:
+        record_answers(conn, rows)
+        cursor.executemany(query, rows)
+
+        # 학습 기록별 답변 수 캐시 갱신 (/learn/logs 에서 answers 를 세지 않도록), 배치 전체를 UPDATE 한 번으로
+        counts = {}
+        for row in rows:
+            counts[row[0]] = counts.get(row[0], 0) + 1
+        log_ids = sorted(counts)
+        cursor.execute(
+            "UPDATE learning_logs SET answer_cnt = answer_cnt + CASE learning_log_id "
+            + " ".join(["WHEN %s THEN %s"] * len(log_ids))
+            + " END WHERE learning_log_id IN (" + ",".join(["%s"] * len(log_ids)) + ")",
+            (*(value for learning_log_id in log_ids for value in (learning_log_id, counts[learning_log_id])), *log_ids),
+        )
+        conn.commit()
     finally:
         cursor.close()
-        conn.close()
 
-    return {"message": "Step data recorded successfully"}
+
+# 답변 write-behind 버퍼 (POST /learn/step?buffered=true)
+answer_buffer = AnswerBuffer(insert_answers)
+
+
+@app.get("/learn/step/buffer")
+async def get_answer_buffer_stats():
+    return answer_buffer.stats()
+
+
+@app.post("/learn/steps")
+async def log_bulk_step_data(request: BulkStepDataRequest):
+    rows = []
+    results = []
+    received_at = datetime.now()
+    for index, step in enumerate(request.steps):
+        # 다른 학습 기록의 항목은 저장하지 않고 건별로 거절
+        if step.learning_log_id not in (None, request.learning_log_id):
+            results.append({"index": index, "sceneId": step.sceneId, "status": "rejected",
+                            "detail": "learning_log_id mismatch"})
+            continue
+        rows.append((request.learning_log_id, step.sceneId, step.question, step.answer, step.response, received_at))
+        results.append({"index": index, "sceneId": step.sceneId, "status": "recorded"})
+
+    if rows:
+        try:
+            await run_db(insert_answers, rows)
+        except Error:
+            raise HTTPException(status_code=500, detail="Failed to log step data")
+
+    return {
+        "message": "Step data recorded successfully",
+        "learning_log_id": request.learning_log_id,
+        "recorded": len(rows),
+        "results": results,
+    }
+
+
+# 학습 세션 API (WebSocket)
+# 연결 시 학습 기록 생성(/learn/start), step 메시지는 답변 버퍼에 모아서 기록(/learn/step?buffered=true),
+# end 메시지는 남은 답변을 기록한 뒤 report=true 면 AI 리포트 작업 등록(/learn/ai_report/jobs)
+# 세션은 DB 연결을 잡고 있지 않으므로 열린 세션 수는 DB 풀 크기와 무관하다
+#   -> {"type": "step", "seq": 1, "sceneId": ..., "question": ..., "answer": ..., "response": ...}
+#   <- {"type": "ack", "seq": 1}
+# ack 는 버퍼에 넣었다는 뜻이며, 기록은 end 응답으로 확인한다. 일괄 기록이 실패하면 행 단위로 다시
+# 기록하고 그래도 실패한 행(외래 키/길이 오류 등)은 로그만 남기고 버린다 (/learn/step/buffer 의 dropped_rows)
+#   -> {"type": "end", "report": true}
+#   <- {"type": "end", "learning_log_id": ..., "recorded": ..., "report_job": {...}}
+async def handle_session_message(websocket, learning_log_id, message):
+    seq = message.get("seq")
+    if message.get("type") == "step":
+        try:
+            step = SessionStepMessage.model_validate(message)
+        except ValidationError as e:
+            await websocket.send_json({"type": "error", "seq": seq, "detail": e.errors(include_url=False)})
+            return False
+        try:
+            answer_buffer.enqueue((learning_log_id, step.sceneId, step.question, step.answer, step.response))
+        except HTTPException as e:
+            await websocket.send_json({"type": "error", "seq": seq, "detail": e.detail})
+            return False
+        await websocket.send_json({"type": "ack", "seq": seq})
+        return True
+
+    await websocket.send_json({"type": "error", "seq": seq, "detail": f"Unknown message type: {message.get('type')}"})
+    return False
+
+
+async def end_session(websocket, learning_log_id, recorded, report):
+    try:
+        await answer_buffer.flush_for(learning_log_id)
+    except (Error, HTTPException) as e:
+        # 버퍼에 남은 행은 다음 flush 때 다시 기록한다
+        await websocket.send_json({"type": "error", "detail": f"Failed to log step data: {e}"})
+        await websocket.close(code=1011)
+        return
+
+    result = {"type": "end", "learning_log_id": learning_log_id, "recorded": recorded, "report_job": None}
+    if report and recorded:
+        try:
+            result["report_job"] = report_jobs.submit(learning_log_id).to_dict()
+        except HTTPException as e:
+            result["report_error"] = e.detail
+    await websocket.send_json(result)
+    await websocket.close()
+
+
+@app.websocket("/learn/session")
+async def learning_session(websocket: WebSocket, scenario_id: int, user_id: str, profile_name: str):
+    await websocket.accept()
+    try:
+        learning_log_id = await run_db(insert_learning_log, scenario_id, user_id, profile_name, datetime.now())
+    except Error as e:
+        await websocket.send_json({"type": "error", "detail": f"Failed to create learning log record: {e}"})
+        await websocket.close(code=1011)
+        return
+    except HTTPException as e:
+        # DB 연결 대기 시간 초과 / 연결 실패
+        await websocket.send_json({"type": "error", "detail": e.detail})
+        await websocket.close(code=1011)
+        return
+    await websocket.send_json({"type": "started", "learning_log_id": learning_log_id})
+
+    LEARNING_SESSIONS.inc()
+    recorded = 0
+    try:
+        while True:
+            try:
+                text = await asyncio.wait_for(websocket.receive_text(), timeout=SESSION_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                # 보낸 답변은 버퍼에서 그대로 기록된다
+                await websocket.close(code=1001, reason="Idle timeout")
+                return
+            try:
+                message = json.loads(text)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "detail": "Message must be a JSON object"})
+                continue
+
+            if message.get("type") == "end":
+                await end_session(websocket, learning_log_id, recorded, bool(message.get("report")))
+                return
+            if await handle_session_message(websocket, learning_log_id, message):
+                recorded += 1
+    except WebSocketDisconnect:
+        # end 없이 끊긴 경우에도 받은 답변은 버퍼에서 기록된다 (리포트는 만들지 않음)
+        pass
+    finally:
+        LEARNING_SESSIONS.dec()
+
+# 조건부 GET (ETag / If-None-Match)
+def make_etag(*parts):
+    return '"' + hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match 는 약한 비교 (W/ 접두어 무시)
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def not_modified(etag, cache_control):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
 
 # 학습 기록 조회 API
-@app.get("/learn/logs", response_model=List[LearningLogResponse])
-async def get_learning_logs(user_id: str, profile_name: str):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+def encode_logs_cursor(learning_time, learning_log_id):
+    raw = json.dumps([learning_time, learning_log_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_logs_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        learning_time, learning_log_id = json.loads(raw)
+        return datetime.fromisoformat(learning_time), int(learning_log_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
+# after = (time, learning_log_id): 이 위치 다음(더 오래된) 기록부터 조회
+def fetch_learning_logs(conn, user_id, profile_name, limit=None, after=None):
+    cursor = conn.cursor(dictionary=True)
+    # (user_id, profile_name, time, learning_log_id) 인덱스만 읽고, 답변 수는 캐시 컬럼,
+    # 시나리오 제목/문항 수는 시나리오 카탈로그 사용
     query = """
         SELECT 
             l.learning_log_id AS learning_log_id,
-            s.title AS scenario_title, 
+            l.scenario_id AS scenario_id,
             l.time AS learning_time, 
-            s.scene_cnt AS scenario_pages, 
-            COUNT(a.learning_log_id) AS num_of_answer_records
+            l.answer_cnt AS num_of_answer_records
         FROM 
             edu_for_disabled.learning_logs l
-        JOIN 
-            edu_for_disabled.scenario s ON l.scenario_id = s.scenario_id
-        LEFT JOIN 
-            edu_for_disabled.answers a ON l.learning_log_id = a.learning_log_id
         WHERE 
             l.user_id = %s AND l.profile_name = %s
-        GROUP BY 
-            l.learning_log_id, s.title, l.time, s.scene_cnt
-        ORDER BY
-            l.time DESC
     """
+    params = [user_id, profile_name]
+
+    if after is not None:
+        query += " AND (l.time < %s OR (l.time = %s AND l.learning_log_id < %s))"
+        params.extend([after[0], after[0], after[1]])
+
+    query += " ORDER BY l.time DESC, l.learning_log_id DESC"
+
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
     try:
-        cursor.execute(query, (user_id, profile_name))
+        cursor.execute(query, tuple(params))
         logs = cursor.fetchall()
 
-        if not logs:
-            return []
-
-        # Convert `learning_time` to string in ISO format
+        result = []
         for log in logs:
+            scenario = scenario_catalog.get(conn, log.pop('scenario_id'))
+            if not scenario:
+                continue
+            log['scenario_title'] = scenario['title']
+            log['scenario_pages'] = scenario['scene_cnt']
+            # Convert `learning_time` to string in ISO format
             log['learning_time'] = log['learning_time'].isoformat()
+            result.append(log)
 
-        return logs
-    except Error as e:
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve learning logs: {str(e)}")
+        return result
     finally:
         cursor.close()
-        conn.close()
 
-@app.get("/answers", response_model=List[AnswerRecord])
-async def get_answers(learning_log_id: int = Query(...)):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
 
+# 목록의 버전: 기록 수, 최신 id, 답변 수 합계 (모두 (user_id, profile_name, ...) 인덱스에서 읽음)
+# 시나리오 제목/문항 수는 바뀌지 않는 것으로 본다
+def fetch_learning_logs_if_modified(conn, user_id, profile_name, limit, after, page_key, if_none_match):
+    cursor = conn.cursor()
+    query = """
+        SELECT COUNT(*), MAX(learning_log_id), SUM(answer_cnt)
+        FROM edu_for_disabled.learning_logs
+        WHERE user_id = %s AND profile_name = %s
+    """
+    try:
+        cursor.execute(query, (user_id, profile_name))
+        version = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    etag = make_etag("logs", user_id, profile_name, page_key, *version)
+    if etag_matches(if_none_match, etag):
+        return etag, None
+    return etag, fetch_learning_logs(conn, user_id, profile_name, limit, after)
+
+
+# limit 을 주면 페이지 단위로 반환하고, 다음 페이지 커서를 X-Next-Cursor 헤더로 전달
+@app.get("/learn/logs", response_model=List[LearningLogResponse])
+async def get_learning_logs(
+    user_id: str,
+    profile_name: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    after = decode_logs_cursor(cursor) if cursor else None
+
+    try:
+        etag, logs = await run_db(
+            fetch_learning_logs_if_modified, user_id, profile_name, limit + 1 if limit else None, after,
+            f"{limit}:{cursor}", if_none_match,
+        )
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve learning logs: {str(e)}")
+
+    if logs is None:
+        return not_modified(etag, "private, no-cache")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+    if limit and len(logs) > limit:
+        logs = logs[:limit]
+        last = logs[-1]
+        response.headers["X-Next-Cursor"] = encode_logs_cursor(last["learning_time"], last["learning_log_id"])
+
+    return logs
+
+def fetch_answers(conn, learning_log_id):
+    cursor = conn.cursor(dictionary=True)
     query = """
         SELECT 
             answer, 
@@ -337,25 +692,54 @@ async def get_answers(learning_log_id: int = Query(...)):
         FROM answers 
         WHERE learning_log_id = %s
     """
+    try:
+        cursor.execute(query, (learning_log_id,))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
 
+# 답변은 추가만 되므로 (최대 hash_num, 개수) 가 버전
+def fetch_answers_if_modified(conn, learning_log_id, if_none_match):
+    cursor = conn.cursor()
+    query = "SELECT MAX(hash_num), COUNT(*) FROM answers WHERE learning_log_id = %s"
     try:
         cursor.execute(query, (learning_log_id,))
-        results = cursor.fetchall()
+        max_hash_num, count = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    etag = make_etag("answers", learning_log_id, max_hash_num, count) if count else None
+    if etag_matches(if_none_match, etag):
+        return etag, None
+    return etag, fetch_answers(conn, learning_log_id)
 
-        if not results:
-            raise HTTPException(status_code=404, detail="No records found for the given learning_log_id")
 
-        return results
+@app.get("/answers", response_model=List[AnswerRecord])
+async def get_answers(
+    response: Response,
+    learning_log_id: int = Query(...),
+    if_none_match: Optional[str] = Header(None),
+):
+    try:
+        await answer_buffer.flush_for(learning_log_id)
+        etag, results = await run_db(fetch_answers_if_modified, learning_log_id, if_none_match)
     except Error as e:
         print(f"Error fetching records: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch records")
-    finally:
-        cursor.close()
-        conn.close()
+
+    if results is None:
+        return not_modified(etag, "private, no-cache")
+
+    if not results:
+        raise HTTPException(status_code=404, detail="No records found for the given learning_log_id")
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return results
 
 # 캐릭터 커스텀 생성 또는 갱신 API
-@app.post("/character/update")
-async def update_character(request: CharacterUpdateRequest):
+def upsert_character(conn, request):
     query_insert_or_update = """
     INSERT INTO edu_for_disabled.character (user_id, profile_name, toggle, prop, eyeShape, bodyShape, bodyColor)
     VALUES (%s, %s, %s, %s, %s, %s, %s)
@@ -366,10 +750,8 @@ async def update_character(request: CharacterUpdateRequest):
         bodyShape = VALUES(bodyShape),
         bodyColor = VALUES(bodyColor)
     """
-
+    cursor = conn.cursor()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
         cursor.execute(
             query_insert_or_update,
             (
@@ -383,159 +765,221 @@ async def update_character(request: CharacterUpdateRequest):
             )
         )
         conn.commit()
+    finally:
         cursor.close()
-        conn.close()
+
+
+@app.post("/character/update")
+async def update_character(request: CharacterUpdateRequest):
+    try:
+        await run_db(upsert_character, request)
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    await character_cache.invalidate((request.user_id, request.profile_name))
 
     return {"message": "Character updated successfully"}
 
 # 캐릭터 커스텀 조회 API
-@app.get("/character/get", response_model=CharacterResponse)
-async def get_character(user_id: str, profile_name: str):
+def fetch_character(conn, user_id, profile_name):
     query_select = """
     SELECT user_id, profile_name, toggle, prop, eyeShape, bodyShape, bodyColor
     FROM edu_for_disabled.character
     WHERE user_id = %s AND profile_name = %s
     """
-
+    cursor = conn.cursor(dictionary=True)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
         cursor.execute(query_select, (user_id, profile_name))
-        result = cursor.fetchone()
+        return cursor.fetchone()
+    finally:
         cursor.close()
-        conn.close()
 
-        if not result:
-            raise HTTPException(status_code=404, detail="Character not found")
 
-        return result
+@app.get("/character/get", response_model=CharacterResponse)
+async def get_character(user_id: str, profile_name: str):
+    try:
+        result = await character_cache.get(
+            (user_id, profile_name), lambda: run_db(fetch_character, user_id, profile_name)
+        )
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-@app.post("/learning_list/add")
-async def add_learning_list_entry(request: AddLearningListRequest):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if not result:
+        raise HTTPException(status_code=404, detail="Character not found")
+
+    return result
 
+def insert_learning_list_entry(conn, user_id, profile_name, title):
+    cursor = conn.cursor()
     try:
-        # scenario_id를 title로 조회
-        query_scenario = """
-            SELECT scenario_id
-            FROM edu_for_disabled.scenario
-            WHERE title = %s
-        """
-        cursor.execute(query_scenario, (request.title,))
-        scenario = cursor.fetchone()
+        # scenario_id를 title로 조회 (시나리오 카탈로그)
+        scenario = scenario_catalog.find_by_title(conn, title)
 
         if not scenario:
             raise HTTPException(status_code=404, detail="Scenario with given title not found")
 
-        scenario_id = scenario[0]
+        scenario_id = scenario["scenario_id"]
 
-        # learning_list에 레코드 추가
+        # learning_list에 레코드 추가 (이미 있으면 그대로 둠)
         query_insert = """
             INSERT INTO edu_for_disabled.learning_list (user_id, profile_name, scenario_id)
             VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE scenario_id = scenario_id
         """
-        cursor.execute(query_insert, (request.user_id, request.profile_name, scenario_id))
+        cursor.execute(query_insert, (user_id, profile_name, scenario_id))
         conn.commit()
+    finally:
+        cursor.close()
+
 
+@app.post("/learning_list/add")
+async def add_learning_list_entry(request: AddLearningListRequest):
+    try:
+        await run_db(insert_learning_list_entry, request.user_id, request.profile_name, request.title)
     except Error as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        cursor.close()
-        conn.close()
 
     return {"message": "Learning list entry added successfully"}
 
-@app.post("/learning_list/scenarios")
-async def get_scenarios_by_user_and_profile(request: ScenarioRequest):
-    conn = get_db_connection()
+def fetch_scenario_titles(conn, user_id, profile_name):
     cursor = conn.cursor()
-
     try:
-        # 시나리오 title 조회 쿼리
+        # 시나리오 id 조회 후 title 은 시나리오 카탈로그에서 찾음
         query = """
-            SELECT s.title
-            FROM edu_for_disabled.learning_list l
-            JOIN edu_for_disabled.scenario s ON l.scenario_id = s.scenario_id
-            WHERE l.user_id = %s AND l.profile_name = %s
+            SELECT scenario_id
+            FROM edu_for_disabled.learning_list
+            WHERE user_id = %s AND profile_name = %s
         """
-        cursor.execute(query, (request.user_id, request.profile_name))
+        cursor.execute(query, (user_id, profile_name))
         results = cursor.fetchall()
 
-        # 데이터가 없는 경우 빈 리스트 반환
-        if not results:
-            return {"titles": []}
+        # 결과를 title 목록으로 반환 (데이터가 없는 경우 빈 리스트)
+        titles = []
+        for row in results:
+            scenario = scenario_catalog.get(conn, row[0])
+            if scenario:
+                titles.append(scenario["title"])
+        return titles
+    finally:
+        cursor.close()
 
-        # 결과를 title 목록으로 반환
-        titles = [row[0] for row in results]
 
+@app.post("/learning_list/scenarios")
+async def get_scenarios_by_user_and_profile(request: ScenarioRequest):
+    try:
+        titles = await run_db(fetch_scenario_titles, request.user_id, request.profile_name)
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        cursor.close()
-        conn.close()
 
     return {"titles": titles}
 
-@app.post("/learning_list/remove")
-async def remove_learning_list_entry(request: RemoveLearningListRequest):
-    conn = get_db_connection()
+def delete_learning_list_entry(conn, user_id, profile_name, title):
     cursor = conn.cursor()
-
     try:
-        # 시나리오 ID를 가져오기 위한 쿼리
-        query_get_scenario_id = """
-            SELECT scenario_id
-            FROM edu_for_disabled.scenario
-            WHERE title = %s
-        """
-        cursor.execute(query_get_scenario_id, (request.title,))
-        scenario = cursor.fetchone()
+        # 시나리오 ID를 title로 조회 (시나리오 카탈로그)
+        scenario = scenario_catalog.find_by_title(conn, title)
 
         if not scenario:
             raise HTTPException(status_code=404, detail="Scenario title not found")
 
-        scenario_id = scenario[0]
+        scenario_id = scenario["scenario_id"]
 
         # learning_list 레코드 삭제 쿼리
         query_delete = """
             DELETE FROM edu_for_disabled.learning_list
             WHERE user_id = %s AND profile_name = %s AND scenario_id = %s
         """
-        cursor.execute(query_delete, (request.user_id, request.profile_name, scenario_id))
+        cursor.execute(query_delete, (user_id, profile_name, scenario_id))
         conn.commit()
 
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="No matching learning list record found")
+    finally:
+        cursor.close()
+
 
+@app.post("/learning_list/remove")
+async def remove_learning_list_entry(request: RemoveLearningListRequest):
+    try:
+        await run_db(delete_learning_list_entry, request.user_id, request.profile_name, request.title)
     except Error as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        cursor.close()
-        conn.close()
 
     return {"message": "Learning list entry removed successfully"}
 
 
-@app.post("/learn/ai_report")
-async def generate_ai_report(request: AIReportRequest):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+# 시나리오 카탈로그 즉시 갱신 (scenario 테이블을 수정한 뒤 호출)
+@app.post("/scenarios/refresh")
+async def refresh_scenario_catalog():
+    try:
+        await run_db(scenario_catalog.load)
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    return {"message": "Scenario catalog refreshed", **scenario_catalog.stats()}
+
+
+@app.get("/scenarios/catalog")
+async def get_scenario_catalog_stats():
+    return scenario_catalog.stats()
+
+
+@app.get("/lookup_cache")
+async def get_lookup_cache_stats():
+    return {"profiles": profile_cache.stats(), "character": character_cache.stats()}
 
+
+# 프로필의 학습 기록/답변/리포트/통계 내보내기 (NDJSON 또는 CSV, 선택적으로 gzip)
+@app.get("/export")
+async def export_history(
+    user_id: str,
+    profile_name: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+):
+    # 자리는 여기서 잡고 내보내기(응답)가 끝날 때 돌려준다
+    slot = reserve_export()
+    if slot is None:
+        raise HTTPException(status_code=503, detail="Too many exports in progress, try again")
+
+    # 버퍼에 남은 답변도 내보내기에 포함
+    try:
+        await answer_buffer.flush()
+    except BaseException:
+        slot.release()
+        raise
+
+    filename = re.sub(r"[^\w.-]", "_", f"{user_id}_{profile_name}.{format}")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return ExportResponse(
+        slot, stream_export(slot, user_id, profile_name, format, gzip), media_type=media_type, headers=headers
+    )
+
+
+# Prometheus 수집 엔드포인트
+@app.get("/metrics")
+async def get_metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
+# 느린 쿼리 목록 (문장별 누적 + EXPLAIN, 최근 기록)
+@app.get("/debug/slow_queries")
+async def get_slow_queries():
+    return slow_query_log.stats()
+
+
+def fetch_report_inputs(conn, learning_log_id):
+    cursor = conn.cursor(dictionary=True)
     try:
         # Step 1: Verify and fetch `learning_log_id` and associated `scenario_id`
         query = """
-            SELECT scenario_id 
+            SELECT scenario_id, time
             FROM edu_for_disabled.learning_logs 
             WHERE learning_log_id = %s
         """
-        cursor.execute(query, (request.learning_log_id,))
+        cursor.execute(query, (learning_log_id,))
         learning_log = cursor.fetchone()
 
         if not learning_log:
@@ -543,46 +987,72 @@ async def generate_ai_report(request: AIReportRequest):
 
         scenario_id = learning_log["scenario_id"]
 
-        # Step 2: Fetch `scenario` data
-        query = """
-            SELECT * 
-            FROM edu_for_disabled.scenario 
-            WHERE scenario_id = %s
-        """
-        cursor.execute(query, (scenario_id,))
-        scenario_data = cursor.fetchall()
+        # Step 2: Fetch `scenario` data (시나리오 카탈로그)
+        scenario = scenario_catalog.get(conn, scenario_id)
 
-        if not scenario_data:
+        if not scenario:
             raise HTTPException(status_code=404, detail="Scenario not found")
 
-        # Step 3: Fetch `answers` data
+        # 학습 시작 시각 (답안지의 응답 시간 계산용)
+        scenario["started_at"] = learning_log["time"]
+        scenario_data = [scenario]
+
+        # Step 3: Fetch `answers` data (프롬프트에 쓰는 컬럼만)
         query = """
-            SELECT * 
+            SELECT sceneId, question, answer, response, time
             FROM edu_for_disabled.answers 
             WHERE learning_log_id = %s
+            ORDER BY hash_num
         """
-        cursor.execute(query, (request.learning_log_id,))
+        cursor.execute(query, (learning_log_id,))
         answers_data = cursor.fetchall()
 
-        # Step 4: Generate AI report
-        result = json.loads(AiReport(scenario_data, answers_data))
+        # 이미 저장된 리포트와 그 지문 (캐시 확인용)
+        query = """
+            SELECT lr.completed, lr.agile, lr.accuracy, lr.context, lr.pronunciation, lr.review,
+                   lr.fingerprint, st.correct_response_cnt, st.timeout_response_cnt
+            FROM edu_for_disabled.learning_report lr
+            LEFT JOIN edu_for_disabled.statics st ON lr.learning_log_id = st.learning_log_id
+            WHERE lr.learning_log_id = %s
+        """
+        cursor.execute(query, (learning_log_id,))
+        stored_report = cursor.fetchone()
+
+        return scenario_data, answers_data, stored_report
+    finally:
+        cursor.close()
+
+
+def save_report(conn, learning_log_id, result, fingerprint):
+    cursor = conn.cursor()
+    try:
+        record_report(conn, learning_log_id, result["correct_response_cnt"], result["timeout_response_cnt"])
 
-        # Step 5: Insert result into `learning_report` table
+        # Step 5: Insert or update result in `learning_report` table
         query = """
             INSERT INTO edu_for_disabled.learning_report (
-                learning_log_id, completed, agile, accuracy, context, pronunciation, review
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                learning_log_id, completed, agile, accuracy, context, pronunciation, review, fingerprint
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                completed = VALUES(completed),
+                agile = VALUES(agile),
+                accuracy = VALUES(accuracy),
+                context = VALUES(context),
+                pronunciation = VALUES(pronunciation),
+                review = VALUES(review),
+                fingerprint = VALUES(fingerprint)
         """
         cursor.execute(
             query,
             (
-                request.learning_log_id,
+                learning_log_id,
                 result["completed"],
                 result["agile"],
                 result["accuracy"],
                 result["context"],
                 result["pronunciation"],
                 result["review"],
+                fingerprint,
             ),
         )
         # Step 6: Update or Insert into `edu_for_disabled.statics`
@@ -598,46 +1068,170 @@ async def generate_ai_report(request: AIReportRequest):
         cursor.execute(
             statics_query,
             (
-                request.learning_log_id,
+                learning_log_id,
                 result["correct_response_cnt"],
                 result["timeout_response_cnt"],
             ),
         )
 
         conn.commit()
+    finally:
+        cursor.close()
+
+
+# 리포트 생성 본체. 작업 큐의 워커에서 실행된다
+# job 이 stream 작업이면 모델 출력 조각을 job 구독자(/learn/ai_report/stream)에게 전달하며 생성
+async def create_ai_report(learning_log_id, job=None):
+    try:
+        await answer_buffer.flush_for(learning_log_id)
+        scenario_data, answers_data, stored_report = await run_db(fetch_report_inputs, learning_log_id)
+
+        # 입력이 바뀌지 않았으면 저장된 리포트를 재사용
+        fingerprint = report_fingerprint(scenario_data, answers_data)
+        if stored_report and stored_report["fingerprint"] == fingerprint:
+            report_cache_stats.record_hit()
+            del stored_report["fingerprint"]
+            return stored_report
+
+        # Step 4: Generate AI report (공유 비동기 클라이언트, DB 연결을 잡고 있지 않음)
+        start = time.perf_counter()
+        if job is not None and job.stream:
+            parts = []
+            async for delta in AiReportStream(scenario_data, answers_data):
+                parts.append(delta)
+                job.publish("delta", delta)
+            result = json.loads("".join(parts))
+        else:
+            result = json.loads(await AiReportAsync(scenario_data, answers_data))
+        report_cache_stats.record_miss(time.perf_counter() - start)
+
+        await run_db(save_report, learning_log_id, result, fingerprint)
+
+        return result
 
-        return {"message": "AI report generated successfully", "report": result}
+    except HTTPException:
+        raise
 
     except Error as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
-    finally:
-        cursor.close()
-        conn.close()
 
-@app.get("/learn/ai_report")
-async def get_ai_report(learning_log_id: int):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+# AI 리포트 작업 큐
+report_jobs = ReportJobQueue(create_ai_report)
+
+
+# 기존 API: 작업을 등록하고 끝날 때까지 기다린 뒤 결과 반환
+@app.post("/learn/ai_report")
+async def generate_ai_report(request: AIReportRequest):
+    job = report_jobs.submit(request.learning_log_id)
+    result = await report_jobs.wait(job)
+
+    return {"message": "AI report generated successfully", "report": result}
+
+
+# 비동기 API: 작업 id를 즉시 반환
+@app.post("/learn/ai_report/jobs", status_code=202)
+async def submit_ai_report_job(request: AIReportRequest):
+    job = report_jobs.submit(request.learning_log_id)
+    return job.to_dict()
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# 스트리밍 API: 작업 큐로 생성하며(동시 생성 수 제한, 같은 학습 기록은 한 번만 생성) 모델 출력 조각을
+# SSE(delta)로 바로 전달하고, 마지막에 저장된 리포트를 done 으로 전달.
+# 클라이언트가 끊겨도 작업은 끝까지 생성/저장한다
+@app.post("/learn/ai_report/stream")
+async def stream_ai_report(request: AIReportRequest):
+    job = report_jobs.submit(request.learning_log_id, stream=True)
+    events = job.subscribe()
+
+    async def event_stream():
+        try:
+            while True:
+                event, data = await events.get()
+                if event == "delta":
+                    yield sse_event("delta", {"content": data})
+                    continue
+                if event == "done":
+                    yield sse_event("done", {"message": "AI report generated successfully", "report": data})
+                else:
+                    yield sse_event("error", data)
+                return
+        finally:
+            job.unsubscribe(events)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/learn/ai_report/cache")
+async def get_ai_report_cache_stats():
+    return report_cache_stats.stats()
+
+
+@app.get("/learn/ai_report/jobs/{job_id}")
+async def get_ai_report_job(job_id: str):
+    job = report_jobs.get(job_id)
 
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+
+    return job.to_dict()
+
+def fetch_ai_report(conn, learning_log_id):
+    cursor = conn.cursor(dictionary=True)
     try:
         # Fetch the AI report for the given learning_log_id
         query = """
-            SELECT * 
+            SELECT learning_log_id, completed, agile, accuracy, context, pronunciation, review
             FROM edu_for_disabled.learning_report 
             WHERE learning_log_id = %s
         """
         cursor.execute(query, (learning_log_id,))
-        report = cursor.fetchone()
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+# 리포트는 입력 지문(fingerprint)이 바뀔 때만 다시 생성된다
+def fetch_ai_report_if_modified(conn, learning_log_id, if_none_match):
+    cursor = conn.cursor()
+    query = "SELECT fingerprint FROM edu_for_disabled.learning_report WHERE learning_log_id = %s"
+    try:
+        cursor.execute(query, (learning_log_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    if row is None:
+        return None, None
+    etag = make_etag("report", learning_log_id, row[0])
+    if etag_matches(if_none_match, etag):
+        return etag, None
+    return etag, fetch_ai_report(conn, learning_log_id)
 
-        if not report:
-            raise HTTPException(status_code=404, detail="AI report not found for the given learning_log_id")
 
-        return report
+@app.get("/learn/ai_report")
+async def get_ai_report(
+    learning_log_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+):
+    # 완료된 리포트는 답변이 추가되어 재생성되기 전까지 그대로이므로 일정 시간 캐시 허용
+    cache_control = f"private, max-age={REPORT_CACHE_MAX_AGE}"
+    try:
+        etag, report = await run_db(fetch_ai_report_if_modified, learning_log_id, if_none_match)
+        if etag is not None and report is None:
+            return not_modified(etag, cache_control)
 
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -645,124 +1239,88 @@ async def get_ai_report(learning_log_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
-    finally:
-        cursor.close()
-        conn.close()
+    if not report:
+        raise HTTPException(status_code=404, detail="AI report not found for the given learning_log_id")
 
-@app.get("/statics")
-async def get_statistics(user_id: str, profile_name: str, start_date: str = None, end_date: str = None):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return report
 
-    try:
-        # Build query conditionally based on date parameters
-        query = """
-                    SELECT learning_log_id, scenario_id
-                    FROM edu_for_disabled.learning_logs
-                    WHERE user_id = %s AND profile_name = %s
-                """
-        params = [user_id, profile_name]
+def fetch_statistics(conn, user_id, profile_name, start_date, end_date):
+    # 일자별 롤업 합산 (기간 경계의 일부 날짜만 원본 데이터로 집계)
+    totals = rollup_statistics(conn, user_id, profile_name, start_date, end_date)
 
-        if start_date and end_date:
-            query += " AND time BETWEEN %s AND %s"
-            params.extend([start_date, end_date])
+    if not totals["learning_log_cnt"]:
+        raise HTTPException(status_code=404, detail="No learning logs found for the given criteria")
 
-        cursor.execute(query, tuple(params))
-        learning_logs = cursor.fetchall()
-
-        if not learning_logs:
-            raise HTTPException(status_code=404, detail="No learning logs found for the given criteria")
-
-        learning_log_ids = [log["learning_log_id"] for log in learning_logs]
-        if not learning_log_ids:
-            # If no matching logs, return zero counts
-            return {
-                "whole_response_cnt": 0,
-                "responsed_question_cnt": 0,
-                "expected_question_cnt": 0,
-                "eval_response_cnt": 0,
-                "correct_response_cnt": 0,
-                "timeout_response_cnt": 0
-            }
-
-        # Calculate whole_response_cnt(전체 응답수)
-        query = """
-               SELECT COUNT(*) as whole_response_cnt
-               FROM edu_for_disabled.answers
-               WHERE learning_log_id IN (%s)
-           """ % ",".join(["%s"] * len(learning_log_ids))
-        cursor.execute(query, learning_log_ids)
-        whole_response_cnt = cursor.fetchall()[0]["whole_response_cnt"]
-
-        # Calculate real_response_cnt(응답한 문항수)
-        query = """
-            SELECT COUNT(*) as responsed_question_cnt
-            FROM (
-                SELECT MAX(hash_num) as latest_hash_num
-                FROM edu_for_disabled.answers
-                WHERE learning_log_id IN (%s)
-                GROUP BY learning_log_id, sceneId
-            ) as latest_answers
-        """ % ",".join(["%s"] * len(learning_log_ids))
-
-        cursor.execute(query, learning_log_ids)
-        responsed_question_cnt = cursor.fetchall()[0]["responsed_question_cnt"]
-
-        # Calculate expect_response_cnt(전체 문항수)
-        query = """
-            SELECT SUM(s.scene_cnt) as expected_question_cnt
-            FROM edu_for_disabled.scenario s
-            JOIN edu_for_disabled.learning_logs l ON s.scenario_id = l.scenario_id
-            WHERE l.learning_log_id IN (%s)
-        """ % ",".join(["%s"] * len(learning_log_ids))
-        cursor.execute(query, learning_log_ids)
-        expected_question_cnt = cursor.fetchall()[0]["expected_question_cnt"] or 0
+    # Return the results as a JSON response
+    return {
+        "whole_response_cnt": totals["whole_response_cnt"],
+        "responsed_question_cnt": totals["responsed_question_cnt"],
+        "expected_question_cnt": totals["expected_question_cnt"],
+        "eval_response_cnt": totals["eval_response_cnt"],
+        "correct_response_cnt": totals["correct_response_cnt"],
+        "timeout_response_cnt": totals["timeout_response_cnt"]
+    }
 
-        query = """
-            SELECT COUNT(*) AS answer_count
-            FROM edu_for_disabled.answers a
-            WHERE a.learning_log_id IN (
-                SELECT lr.learning_log_id
-                FROM edu_for_disabled.learning_report lr
-                WHERE lr.learning_log_id IN (%s)
-            )
-        """ % ",".join(["%s"] * len(learning_log_ids))
 
-        # 쿼리 실행
-        cursor.execute(query, learning_log_ids)
-        eval_response_cnt = cursor.fetchone()["answer_count"] or 0
+@app.get("/statics")
+async def get_statistics(user_id: str, profile_name: str, start_date: str = None, end_date: str = None):
+    try:
+        return await run_db(fetch_statistics, user_id, profile_name, start_date, end_date)
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+# 홈 화면 API: 프로필/캐릭터/학습 목록/학습 기록/통계를 한 번에 조회
+HOME_FIELDS = ["profiles", "character", "scenarios", "logs", "statics"]
 
-        # Calculate correct_response_cnt
-        query = """
-            SELECT SUM(correct_response_cnt) as correct_response_cnt
-            FROM edu_for_disabled.statics
-            WHERE learning_log_id IN (%s)
-        """ % ",".join(["%s"] * len(learning_log_ids))
-        cursor.execute(query, learning_log_ids)
-        correct_response_cnt = cursor.fetchall()[0]["correct_response_cnt"] or 0
-
-        # Calculate timeout_response_cnt
-        query = """
-            SELECT SUM(timeout_response_cnt) as timeout_response_cnt
-            FROM edu_for_disabled.statics
-            WHERE learning_log_id IN (%s)
-        """ % ",".join(["%s"] * len(learning_log_ids))
-        cursor.execute(query, learning_log_ids)
-        timeout_response_cnt = cursor.fetchall()[0]["timeout_response_cnt"] or 0
-
-        # Return the results as a JSON response
-        return {
-            "whole_response_cnt": whole_response_cnt,
-            "responsed_question_cnt": responsed_question_cnt,
-            "expected_question_cnt": expected_question_cnt,
-            "eval_response_cnt": eval_response_cnt,
-            "correct_response_cnt": correct_response_cnt,
-            "timeout_response_cnt": timeout_response_cnt
-        }
 
+def fetch_statistics_or_none(conn, user_id, profile_name):
+    try:
+        return fetch_statistics(conn, user_id, profile_name, None, None)
+    except HTTPException:
+        # 학습 기록이 없으면 null
+        return None
+
+
+@app.get("/home")
+async def get_home(
+    user_id: str,
+    profile_name: str,
+    fields: Optional[str] = None,
+    logs_limit: int = Query(20, ge=1, le=100),
+):
+    # fields: 쉼표로 구분한 항목만 조회 (클라이언트가 캐시한 항목은 빼고 요청)
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else HOME_FIELDS
+    unknown = [field for field in selected if field not in HOME_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    # 항목마다 풀에서 연결을 따로 받아 동시에 조회 (프로필/캐릭터는 조회 캐시 사용)
+    loaders = {
+        "profiles": lambda: profile_cache.get((user_id,), lambda: run_db(fetch_profiles, user_id)),
+        "character": lambda: character_cache.get(
+            (user_id, profile_name), lambda: run_db(fetch_character, user_id, profile_name)
+        ),
+        "scenarios": lambda: run_db(fetch_scenario_titles, user_id, profile_name),
+        "logs": lambda: run_db(fetch_learning_logs, user_id, profile_name, logs_limit + 1),
+        "statics": lambda: run_db(fetch_statistics_or_none, user_id, profile_name),
+    }
+    names = [field for field in HOME_FIELDS if field in selected]
+
+    try:
+        values = await asyncio.gather(*(loaders[name]() for name in names))
     except Error as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-    finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+    result = dict(zip(names, values))
+    if "profiles" in result:
+        result["profiles"] = result["profiles"] or []
+    if "logs" in result:
+        logs = result["logs"]
+        result["logs_next_cursor"] = None
+        if len(logs) > logs_limit:
+            logs = result["logs"] = logs[:logs_limit]
+            last = logs[-1]
+            result["logs_next_cursor"] = encode_logs_cursor(last["learning_time"], last["learning_log_id"])
+    return result
@@ -0,0 +1,91 @@
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, multiprocess
+from prometheus_client import CONTENT_TYPE_LATEST
+import time
+import os
+
+# 요청/모델 호출 지연 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# DB 연결 대여/쿼리 지연 구간(초)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_RESPONSES = Counter("http_responses_total", "상태 코드별 HTTP 응답 수", ["method", "route", "status"])
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "처리 중인 HTTP 요청 수", ["method"], multiprocess_mode="livesum"
+)
+LEARNING_SESSIONS = Gauge("learning_sessions_open", "열려 있는 학습 세션(WebSocket) 수", multiprocess_mode="livesum")
+
+DB_CHECKOUT_SECONDS = Histogram("db_pool_checkout_seconds", "커넥션 풀에서 연결을 빌리는 데 걸린 시간", buckets=DB_BUCKETS)
+DB_EXECUTOR_WAIT_SECONDS = Histogram(
+    "db_executor_wait_seconds", "run_db 호출이 DB 스레드를 기다린 시간", buckets=DB_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "run_db 로 실행한 DB 함수별 실행 시간 (연결 대여 포함)", ["query"], buckets=DB_BUCKETS
+)
+
+OPENAI_REQUEST_SECONDS = Histogram(
+    "openai_request_duration_seconds", "OpenAI 호출 시간 (스트리밍은 마지막 조각까지)", ["mode", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+OPENAI_TOKENS = Counter("openai_tokens_total", "OpenAI 사용 토큰 수", ["type"])
+OPENAI_REQUEST_TOKENS = Histogram(
+    "openai_request_tokens", "OpenAI 호출 1건의 토큰 수 (프롬프트 크기 대비 지연 추적용)", ["type"],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+
+
+def observe_openai(mode, outcome, started_at, usage=None):
+    OPENAI_REQUEST_SECONDS.labels(mode, outcome).observe(time.perf_counter() - started_at)
+    if usage is not None:
+        OPENAI_TOKENS.labels("prompt").inc(usage.prompt_tokens or 0)
+        OPENAI_TOKENS.labels("completion").inc(usage.completion_tokens or 0)
+        OPENAI_REQUEST_TOKENS.labels("prompt").observe(usage.prompt_tokens or 0)
+        OPENAI_REQUEST_TOKENS.labels("completion").observe(usage.completion_tokens or 0)
+
+
+class MetricsMiddleware:
+    """라우트별 지연/응답 수와 처리 중인 요청 수를 기록하는 ASGI 미들웨어.
+
+    라우트 라벨은 경로 템플릿(/learn/ai_report/jobs/{job_id})을 쓰고, 어느 라우트에도
+    맞지 않은 요청은 "unmatched" 로 묶어 라벨 수가 늘어나지 않게 한다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(method, path).observe(time.perf_counter() - started_at)
+            HTTP_RESPONSES.labels(method, path, str(status)).inc()
+
+
+def render_metrics():
+    # uvicorn 워커가 여러 개면 PROMETHEUS_MULTIPROC_DIR 을 지정해 워커 값을 합친다
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,175 @@
+from mysql.connector import Error
+import argparse
+import re
+import sys
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1") == "1"            # 앱 시작 시 마이그레이션 적용
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", 60))       # 다른 워커의 적용을 기다리는 시간(초)
+MIGRATION_LOCK = "edu_for_disabled.migrations"
+
+# 이미 반영된 변경으로 보고 넘어가는 오류 (덤프로 만든 DB, 손으로 적용한 DB 에서 다시 실행해도 되도록)
+ALREADY_APPLIED = {
+    1050,  # ER_TABLE_EXISTS_ERROR
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1068,  # ER_MULTIPLE_PRI_KEY
+    1091,  # ER_CANT_DROP_FIELD_OR_KEY
+}
+
+# check: 마이그레이션 후 있어야 하는 인덱스
+EXPECTED_INDEXES = [
+    ("answers", "idx_answers_log_scene"),
+    ("learning_logs", "idx_learning_logs_profile_time"),
+    ("learning_list", "PRIMARY"),
+]
+
+# check: (설명, 쿼리, 예시 파라미터, 테이블, 허용하는 인덱스)
+PLAN_CHECKS = [
+    (
+        "latest answer per scene",
+        "SELECT MAX(hash_num) FROM answers WHERE learning_log_id = %s GROUP BY learning_log_id, sceneId",
+        (1,), "answers", ("idx_answers_log_scene",),
+    ),
+    (
+        "answers version (ETag)",
+        "SELECT MAX(hash_num), COUNT(*) FROM answers WHERE learning_log_id = %s",
+        (1,), "answers", ("idx_answers_log_scene",),
+    ),
+    (
+        "learning logs page",
+        "SELECT learning_log_id, scenario_id, time, answer_cnt FROM learning_logs "
+        "WHERE user_id = %s AND profile_name = %s ORDER BY time DESC, learning_log_id DESC LIMIT 20",
+        ("u", "p"), "learning_logs", ("idx_learning_logs_profile_time",),
+    ),
+    (
+        "learning list by profile",
+        "SELECT scenario_id FROM learning_list WHERE user_id = %s AND profile_name = %s",
+        ("u", "p"), "learning_list", ("PRIMARY", "fk_profile_user"),
+    ),
+]
+
+
+def load_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r"^(\d+)_(.+)\.sql$", filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version varchar(20) NOT NULL,
+            name varchar(100) NOT NULL,
+            applied_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (version)
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_migrations(conn):
+    # 여러 워커가 동시에 시작해도 한 곳에서만 적용
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise Error(msg="Timed out waiting for migration lock")
+        try:
+            done = applied_versions(cursor)
+            applied = []
+            for version, name, path in load_migrations():
+                if version in done:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    statements = split_statements(f.read())
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except Error as e:
+                        if e.errno not in ALREADY_APPLIED:
+                            conn.rollback()
+                            raise
+                        print(f"migration {version}: skipped ({e.msg})")
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                conn.commit()
+                applied.append(version)
+                print(f"migration {version}_{name} applied")
+            return applied
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def migration_status(conn):
+    cursor = conn.cursor()
+    try:
+        done = applied_versions(cursor)
+    finally:
+        cursor.close()
+    return [(version, name, version in done) for version, name, _ in load_migrations()]
+
+
+def check_plans(conn):
+    # 기대하는 인덱스가 있고, 주요 쿼리의 EXPLAIN 이 그 인덱스를 쓰는지 확인
+    results = []
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for table, index in EXPECTED_INDEXES:
+            cursor.execute(
+                "SELECT COUNT(*) AS n FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+                (table, index),
+            )
+            ok = cursor.fetchall()[0]["n"] > 0
+            results.append((f"index {table}.{index}", ok, "present" if ok else "missing"))
+
+        for description, query, params, table, keys in PLAN_CHECKS:
+            cursor.execute("EXPLAIN " + query, params)
+            rows = [row for row in cursor.fetchall() if row.get("table") == table]
+            key = rows[0].get("key") if rows else None
+            results.append((description, key in keys, f"key={key} expected={'|'.join(keys)}"))
+    finally:
+        cursor.close()
+    return results
+
+
+if __name__ == "__main__":
+    from db import _connect
+
+    parser = argparse.ArgumentParser(description="스키마 마이그레이션")
+    parser.add_argument("command", nargs="?", choices=["apply", "status", "check"], default="apply")
+    args = parser.parse_args()
+
+    connection = _connect()
+    try:
+        if args.command == "apply":
+            applied = apply_migrations(connection)
+            print(f"{len(applied)} migration(s) applied")
+        elif args.command == "status":
+            for version, name, done in migration_status(connection):
+                print(f"{version}_{name}: {'applied' if done else 'pending'}")
+        else:
+            results = check_plans(connection)
+            for description, ok, detail in results:
+                print(f"[{'OK' if ok else 'FAIL'}] {description}: {detail}")
+            if not all(ok for _, ok, _ in results):
+                sys.exit(1)
+    finally:
+        connection.close()
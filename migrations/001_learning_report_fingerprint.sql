@@ -0,0 +1,3 @@
+-- AI 리포트 입력 지문 (같은 입력이면 저장된 리포트 재사용)
+ALTER TABLE `learning_report`
+  ADD COLUMN `fingerprint` char(64) DEFAULT NULL;
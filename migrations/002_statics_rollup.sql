@@ -0,0 +1,40 @@
+-- 사용자/프로필/일자별 학습 통계 롤업 (/statics 가 합산)
+CREATE TABLE IF NOT EXISTS `statics_rollup` (
+  `user_id` varchar(20) NOT NULL,
+  `profile_name` varchar(20) NOT NULL,
+  `day` date NOT NULL,
+  `learning_log_cnt` int NOT NULL DEFAULT '0',
+  `whole_response_cnt` int NOT NULL DEFAULT '0',
+  `responsed_question_cnt` int NOT NULL DEFAULT '0',
+  `expected_question_cnt` int NOT NULL DEFAULT '0',
+  `eval_response_cnt` int NOT NULL DEFAULT '0',
+  `correct_response_cnt` int NOT NULL DEFAULT '0',
+  `timeout_response_cnt` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`user_id`,`profile_name`,`day`),
+  CONSTRAINT `fk_statics_rollup_profiles` FOREIGN KEY (`user_id`, `profile_name`) REFERENCES `profiles` (`user_id`, `profile_name`) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- 기존 데이터로 백필 (python statics_rollup.py rebuild 와 같은 집계)
+REPLACE INTO `statics_rollup` (
+  user_id, profile_name, day, learning_log_cnt, whole_response_cnt, responsed_question_cnt,
+  expected_question_cnt, eval_response_cnt, correct_response_cnt, timeout_response_cnt
+)
+SELECT
+  l.user_id, l.profile_name, DATE(l.time),
+  COUNT(*),
+  COALESCE(SUM(a.answer_cnt), 0),
+  COALESCE(SUM(a.scene_cnt), 0),
+  COALESCE(SUM(s.scene_cnt), 0),
+  COALESCE(SUM(CASE WHEN lr.learning_log_id IS NOT NULL THEN a.answer_cnt END), 0),
+  COALESCE(SUM(st.correct_response_cnt), 0),
+  COALESCE(SUM(st.timeout_response_cnt), 0)
+FROM `learning_logs` l
+LEFT JOIN `scenario` s ON s.scenario_id = l.scenario_id
+LEFT JOIN (
+  SELECT learning_log_id, COUNT(*) AS answer_cnt, COUNT(DISTINCT sceneId) AS scene_cnt
+  FROM `answers`
+  GROUP BY learning_log_id
+) a ON a.learning_log_id = l.learning_log_id
+LEFT JOIN `learning_report` lr ON lr.learning_log_id = l.learning_log_id
+LEFT JOIN `statics` st ON st.learning_log_id = l.learning_log_id
+GROUP BY l.user_id, l.profile_name, DATE(l.time);
@@ -0,0 +1,13 @@
+-- /learn/logs 목록: 학습 기록별 답변 수 캐시 + (프로필, 시간) 커버링 인덱스
+ALTER TABLE `learning_logs`
+  ADD COLUMN `answer_cnt` int NOT NULL DEFAULT '0',
+  ADD KEY `idx_learning_logs_profile_time` (`user_id`,`profile_name`,`time`,`learning_log_id`,`scenario_id`,`answer_cnt`);
+
+-- 기존 답변 수 백필
+UPDATE `learning_logs` l
+JOIN (
+  SELECT learning_log_id, COUNT(*) AS answer_cnt
+  FROM `answers`
+  GROUP BY learning_log_id
+) a ON a.learning_log_id = l.learning_log_id
+SET l.answer_cnt = a.answer_cnt;
@@ -0,0 +1,7 @@
+-- 장면별 최신 답변(MAX(hash_num) ... GROUP BY learning_log_id, sceneId) 조회용 인덱스
+ALTER TABLE `answers`
+  ADD KEY `idx_answers_log_scene` (`learning_log_id`,`sceneId`,`hash_num`);
+
+-- learning_log_id 단일 인덱스는 위 인덱스가 대신한다 (외래 키도 위 인덱스 사용)
+ALTER TABLE `answers`
+  DROP KEY `fk_learning_log_id`;
@@ -0,0 +1,13 @@
+-- learning_list 중복 행 정리 후 (user_id, profile_name, scenario_id) 를 기본 키로 지정
+CREATE TEMPORARY TABLE `learning_list_dedup` AS
+  SELECT DISTINCT user_id, profile_name, scenario_id FROM `learning_list`;
+
+DELETE FROM `learning_list`;
+
+INSERT INTO `learning_list` (user_id, profile_name, scenario_id)
+  SELECT user_id, profile_name, scenario_id FROM `learning_list_dedup`;
+
+DROP TEMPORARY TABLE `learning_list_dedup`;
+
+ALTER TABLE `learning_list`
+  ADD PRIMARY KEY (`user_id`,`profile_name`,`scenario_id`);
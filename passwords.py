@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+import asyncio
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 비밀번호 해시 설정
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))                # bcrypt cost factor
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", 4))           # 해시 계산 스레드 수
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", 64))    # 대기 가능한 해시 작업 수
+
+# cost 가 BCRYPT_ROUNDS 와 다른 해시는 로그인 시 다시 해시한다
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt 는 계산 중 GIL 을 놓으므로 스레드 풀에서 병렬로 실행된다
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
+_inflight = 0
+
+
+async def _run(func, *args):
+    global _inflight
+    # 실행 중 + 대기 중인 작업 수 제한 (로그인 폭주 시 큐가 끝없이 늘지 않도록)
+    if _inflight >= PASSWORD_WORKERS + PASSWORD_QUEUE_SIZE:
+        raise HTTPException(status_code=503, detail="Too many password requests, try again")
+    _inflight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        _inflight -= 1
+
+
+# 비밀번호 해싱
+async def hash_password(password: str):
+    return await _run(pwd_context.hash, password)
+
+
+# (일치 여부, 새 해시) 반환. 저장된 해시의 cost 가 설정과 다르면 새 해시를 함께 돌려준다
+async def verify_password(plain_password, hashed_password):
+    return await _run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def stats():
+    return {"inflight": _inflight, "workers": PASSWORD_WORKERS, "queue_size": PASSWORD_QUEUE_SIZE}
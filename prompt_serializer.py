@@ -0,0 +1,44 @@
+from datetime import datetime
+import json
+
+# 답안지 한 줄(JSON 배열)의 필드 순서. sec: 직전 답변(첫 답변은 학습 시작)부터 걸린 시간(초)
+ANSWER_FIELDS = ["scene", "question", "answer", "response", "sec"]
+
+
+def _text(value):
+    # scenario.title 은 varbinary
+    return value.decode("utf-8") if isinstance(value, (bytes, bytearray)) else value
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _seconds(previous, current):
+    if not isinstance(previous, datetime) or not isinstance(current, datetime):
+        return None
+    return max(int((current - previous).total_seconds()), 0)
+
+
+def serialize_scenario(scenario_data):
+    return "\n".join(_dumps({"title": _text(row["title"]), "scene_cnt": row["scene_cnt"]}) for row in scenario_data)
+
+
+def serialize_answers(answers_data, started_at=None):
+    lines = [_dumps(ANSWER_FIELDS)]
+    previous = started_at
+    for row in answers_data:
+        lines.append(_dumps([
+            row["sceneId"], row["question"], row["answer"], row["response"], _seconds(previous, row["time"]),
+        ]))
+        previous = row["time"]
+    return "\n".join(lines)
+
+
+def build_user_content(scenario_data, answers_data):
+    # 같은 입력이면 항상 같은 문자열 (리포트 지문도 이 문자열로 계산)
+    started_at = scenario_data[0].get("started_at") if scenario_data else None
+    return "".join([
+        "[scenario info]:\n", serialize_scenario(scenario_data),
+        "\n[answer sheet]:\n", serialize_answers(answers_data, started_at),
+    ])
@@ -0,0 +1,168 @@
+"""리포트가 없는 학습 기록에 AI 리포트를 일괄 생성한다.
+
+답변이 있지만 learning_report 가 없는 학습 기록을 learning_log_id 순으로 찾아, /learn/ai_report 와
+같은 경로(create_ai_report: 같은 프롬프트, 같은 저장)로 리포트를 만든다. 페이지마다 진행 상황을
+체크포인트 파일에 기록하므로 중단 후 같은 명령으로 이어서 실행할 수 있다.
+
+사용법:
+  python report_backfill.py --concurrency 4 --rate 2 --retry-budget 20
+  python report_backfill.py --dry-run                 # 대상만 출력
+  python report_backfill.py --retry-failed            # 이전에 실패한 기록까지 처음부터 다시
+  # 로컬 스텁으로 시험
+  uvicorn --app-dir benchmarks openai_stub:app --port 9000
+  OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=stub python report_backfill.py
+"""
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import json
+import time
+import os
+
+from db import db_pool, db_executor, run_db
+from gpt import init_clients, close_clients
+from main import create_ai_report
+
+CHECKPOINT_FILE = os.getenv("REPORT_BACKFILL_CHECKPOINT", "report_backfill.checkpoint.json")
+
+
+def find_missing_reports(conn, after_id, limit, started_before):
+    cursor = conn.cursor()
+    query = """
+        SELECT l.learning_log_id
+        FROM edu_for_disabled.learning_logs l
+        WHERE l.learning_log_id > %s
+          AND l.time < %s
+          AND EXISTS (SELECT 1 FROM edu_for_disabled.answers a WHERE a.learning_log_id = l.learning_log_id)
+          AND NOT EXISTS (
+              SELECT 1 FROM edu_for_disabled.learning_report lr WHERE lr.learning_log_id = l.learning_log_id
+          )
+        ORDER BY l.learning_log_id
+        LIMIT %s
+    """
+    try:
+        cursor.execute(query, (after_id, started_before, limit))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class RateLimiter:
+    """초당 rate 회까지 시작을 허용한다 (요청 사이 간격을 고르게)."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+
+
+class Backfill:
+    def __init__(self, concurrency, rate, retry_budget, max_attempts, checkpoint):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(rate)
+        self.retry_budget = retry_budget
+        self.max_attempts = max_attempts
+        self.checkpoint_path = checkpoint
+        self.state = {"last_id": 0, "done": 0, "failed": {}}
+        self.retries = 0
+
+    def load_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                self.state.update(json.load(f))
+
+    def save_checkpoint(self):
+        # 쓰는 도중 중단돼도 이전 체크포인트가 남도록 임시 파일에 쓴 뒤 교체
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.checkpoint_path)
+
+    async def generate(self, learning_log_id):
+        async with self.semaphore:
+            attempt = 1
+            while True:
+                await self.limiter.wait()
+                try:
+                    await create_ai_report(learning_log_id)
+                    self.state["done"] += 1
+                    self.state["failed"].pop(str(learning_log_id), None)
+                    print(f"[{learning_log_id}] ok")
+                    return
+                except HTTPException as e:
+                    # 4xx(답변/시나리오 없음 등)는 다시 해도 같으므로 재시도하지 않음
+                    retryable = e.status_code >= 500
+                    if retryable and attempt < self.max_attempts and self.retries < self.retry_budget:
+                        self.retries += 1
+                        delay = 2 ** (attempt - 1)
+                        print(f"[{learning_log_id}] {e.status_code} {e.detail} - retry in {delay}s")
+                        await asyncio.sleep(delay)
+                        attempt += 1
+                        continue
+                    self.state["failed"][str(learning_log_id)] = f"{e.status_code} {e.detail}"
+                    print(f"[{learning_log_id}] failed: {e.status_code} {e.detail}")
+                    return
+
+    async def run(self, page_size, min_age, limit, dry_run):
+        started_before = datetime.now() - timedelta(minutes=min_age)
+        processed = 0
+        while limit is None or processed < limit:
+            size = page_size if limit is None else min(page_size, limit - processed)
+            # last_id 이후만 찾으므로 이전 실행에서 실패한 기록은 --retry-failed 없이는 다시 하지 않음
+            ids = await run_db(find_missing_reports, self.state["last_id"], size, started_before)
+            if not ids:
+                break
+            if dry_run:
+                print(" ".join(map(str, ids)))
+            else:
+                await asyncio.gather(*(self.generate(i) for i in ids))
+            processed += len(ids)
+            self.state["last_id"] = ids[-1]
+            if not dry_run:
+                self.save_checkpoint()
+        return processed
+
+
+async def main_async(args):
+    backfill = Backfill(args.concurrency, args.rate, args.retry_budget, args.max_attempts, args.checkpoint)
+    # --retry-failed 는 처음부터 다시 찾는다 (이미 만든 리포트는 쿼리에서 빠진다)
+    if not args.retry_failed:
+        backfill.load_checkpoint()
+
+    db_pool.warm()
+    init_clients()
+    try:
+        processed = await backfill.run(args.page_size, args.min_age, args.limit, args.dry_run)
+    finally:
+        await close_clients()
+        db_executor.shutdown(wait=True)
+        db_pool.dispose()
+
+    state = backfill.state
+    print(f"processed {processed}, generated {state['done']} total, failed {len(state['failed'])}, "
+          f"retries used {backfill.retries}/{args.retry_budget}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 생성할 리포트 수")
+    parser.add_argument("--rate", type=float, default=2.0, help="초당 최대 모델 호출 수 (0 이면 제한 없음)")
+    parser.add_argument("--retry-budget", type=int, default=20, help="실행 전체에서 허용하는 재시도 횟수")
+    parser.add_argument("--max-attempts", type=int, default=3, help="학습 기록 하나당 최대 시도 횟수")
+    parser.add_argument("--page-size", type=int, default=50, help="한 번에 찾는 학습 기록 수 (체크포인트 단위)")
+    parser.add_argument("--min-age", type=float, default=30, help="이 시간(분) 안에 시작한 학습은 진행 중으로 보고 제외")
+    parser.add_argument("--limit", type=int, help="처리할 최대 학습 기록 수")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--retry-failed", action="store_true", help="체크포인트를 무시하고 실패한 기록까지 다시 시도")
+    parser.add_argument("--dry-run", action="store_true", help="대상 learning_log_id 만 출력")
+    asyncio.run(main_async(parser.parse_args()))
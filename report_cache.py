@@ -0,0 +1,45 @@
+from gpt import PROMPT_VERSION
+from prompt_serializer import build_user_content
+import hashlib
+import threading
+
+
+# 리포트 입력의 지문: 프롬프트 버전 + 모델에 실제로 보내는 사용자 메시지
+def report_fingerprint(scenario_data, answers_data):
+    payload = PROMPT_VERSION + "\n" + build_user_content(scenario_data, answers_data)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ReportCacheStats:
+    """리포트 캐시 적중/미스 카운터와 모델 호출 시간 누적."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.model_seconds = 0.0
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self, model_seconds):
+        with self._lock:
+            self.misses += 1
+            self.model_seconds += model_seconds
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            avg_model_seconds = self.model_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "avg_model_seconds": round(avg_model_seconds, 3),
+                # 적중한 요청이 아낀 모델 호출 시간 추정치
+                "saved_model_seconds": round(self.hits * avg_model_seconds, 3),
+            }
+
+
+report_cache_stats = ReportCacheStats()
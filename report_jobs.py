@@ -0,0 +1,189 @@
+from fastapi import HTTPException
+from datetime import datetime
+import asyncio
+import uuid
+import time
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# AI 리포트 작업 큐 설정
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", 4))                # 동시에 생성하는 리포트 수
+REPORT_QUEUE_SIZE = int(os.getenv("REPORT_QUEUE_SIZE", 100))        # 대기 가능한 작업 수
+REPORT_JOB_RETENTION = float(os.getenv("REPORT_JOB_RETENTION", 3600))  # 끝난 작업을 보관하는 시간(초)
+
+
+class ReportJob:
+    def __init__(self, learning_log_id, stream=False):
+        self.job_id = uuid.uuid4().hex
+        self.learning_log_id = learning_log_id
+        self.stream = stream
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.finished_monotonic = None
+        self.future = asyncio.get_running_loop().create_future()
+        # 스트리밍: 지금까지 받은 모델 출력 조각과 구독 중인 큐
+        self.deltas = []
+        self._listeners = []
+
+    def publish(self, event, data):
+        if event == "delta":
+            self.deltas.append(data)
+        for listener in self._listeners:
+            listener.put_nowait((event, data))
+
+    def subscribe(self):
+        # 중간에 구독해도 처음 조각부터 받도록 지금까지의 조각을 먼저 넣어 둔다
+        listener = asyncio.Queue()
+        for delta in self.deltas:
+            listener.put_nowait(("delta", delta))
+        if self.status == "done":
+            listener.put_nowait(("done", self.result))
+        elif self.status == "failed":
+            listener.put_nowait(("error", self.error))
+        else:
+            self._listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "learning_log_id": self.learning_log_id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ReportJobQueue:
+    """AI 리포트 생성 작업 큐. handler(learning_log_id, job)는 리포트 dict를 돌려주는 코루틴이다.
+
+    같은 learning_log_id로 진행 중인 작업이 있으면 새 작업을 만들지 않고 그 작업을 공유한다.
+    stream 작업이면 handler 가 job.publish("delta", ...) 로 모델 출력 조각을 구독자에게 전달한다.
+    """
+
+    def __init__(self, handler, workers=REPORT_WORKERS, max_queued=REPORT_QUEUE_SIZE,
+                 retention=REPORT_JOB_RETENTION):
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._queue = None
+        self._jobs = {}
+        self._active = {}
+        self._tasks = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # 시작하지 못한 작업도 끝내서 기다리는 요청/스트림이 멈춰 있지 않게 한다
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            job.status = "failed"
+            job.error = {"status_code": 503, "detail": "Report worker stopped"}
+            job.future.cancel()
+            job.publish("error", job.error)
+            job._listeners = []
+            job.finished_at = datetime.now()
+            job.finished_monotonic = time.monotonic()
+            self._active.pop(job.learning_log_id, None)
+
+    def submit(self, learning_log_id, stream=False):
+        self._prune()
+
+        job = self._active.get(learning_log_id)
+        if job is not None:
+            if stream and job.status == "queued":
+                job.stream = True
+            return job
+
+        job = ReportJob(learning_log_id, stream)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Report queue is full")
+        self._jobs[job.job_id] = job
+        self._active[learning_log_id] = job
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    async def wait(self, job):
+        # 기다리던 요청이 끊겨도 작업 자체는 취소되지 않도록 shield
+        return await asyncio.shield(job.future)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = datetime.now()
+            try:
+                job.result = await self.handler(job.learning_log_id, job)
+                job.status = "done"
+                job.future.set_result(job.result)
+                job.publish("done", job.result)
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = {"status_code": 503, "detail": "Report worker stopped"}
+                job.future.cancel()
+                job.publish("error", job.error)
+                raise
+            except Exception as e:
+                job.status = "failed"
+                if isinstance(e, HTTPException):
+                    job.error = {"status_code": e.status_code, "detail": e.detail}
+                else:
+                    job.error = {"status_code": 500, "detail": str(e)}
+                job.future.set_exception(e)
+                # 아무도 기다리지 않는 작업의 예외 경고 방지
+                job.future.exception()
+                job.publish("error", job.error)
+            finally:
+                # 끝난 작업의 조각은 result 에 모두 들어 있다
+                job.deltas = []
+                job._listeners = []
+                job.finished_at = datetime.now()
+                job.finished_monotonic = time.monotonic()
+                self._active.pop(job.learning_log_id, None)
+                self._queue.task_done()
+
+    def _prune(self):
+        # 보관 시간이 지난 완료 작업 정리
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_monotonic is not None and now - job.finished_monotonic > self.retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "active": len(self._active),
+            "tracked": len(self._jobs),
+        }
@@ -0,0 +1,98 @@
+import threading
+import time
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 시나리오 카탈로그 설정
+SCENARIO_CATALOG_TTL = float(os.getenv("SCENARIO_CATALOG_TTL", 300))        # 이 시간(초)이 지나면 다시 읽음
+SCENARIO_CATALOG_MISS_RELOAD = float(os.getenv("SCENARIO_CATALOG_MISS_RELOAD", 5))  # 조회 실패 시 재로딩 최소 간격(초)
+
+
+class ScenarioCatalog:
+    """scenario 테이블 전체를 메모리에 두고 scenario_id / title 조회를 DB 없이 처리한다.
+
+    조회 메서드는 DB 스레드(run_db)에서 연결과 함께 호출되며, 만료되었거나 찾지 못한 경우
+    그 연결로 다시 읽는다.
+    """
+
+    def __init__(self, ttl=SCENARIO_CATALOG_TTL, miss_reload=SCENARIO_CATALOG_MISS_RELOAD):
+        self.ttl = ttl
+        self.miss_reload = miss_reload
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._by_title = {}
+        self._loaded_at = None
+        self.loads = 0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, conn):
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT * FROM edu_for_disabled.scenario")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        by_id = {row["scenario_id"]: row for row in rows}
+        by_title = {_title_key(row["title"]): row for row in rows}
+        with self._lock:
+            self._by_id, self._by_title = by_id, by_title
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _lookup(self, conn, index, key):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            self.load(conn)
+            loaded_at = time.monotonic()
+
+        row = getattr(self, index).get(key)
+        if row is None and time.monotonic() - loaded_at > self.miss_reload:
+            # 새로 추가된 시나리오일 수 있으므로 한 번 더 읽음
+            self.load(conn)
+            row = getattr(self, index).get(key)
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # SELECT * FROM scenario 한 행과 같은 dict (호출자가 수정해도 캐시는 그대로)
+        return dict(row)
+
+    def snapshot(self, conn):
+        # scenario_id -> 행. 열린 커서가 있는 연결에서는 다시 읽을 수 없으므로, 필요하면 미리 읽어 두고 이 dict 로 조회
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            self.load(conn)
+        return self._by_id
+
+    def get(self, conn, scenario_id):
+        return self._lookup(conn, "_by_id", scenario_id)
+
+    def find_by_title(self, conn, title):
+        return self._lookup(conn, "_by_title", title)
+
+    def stats(self):
+        return {
+            "scenarios": len(self._by_id),
+            "loads": self.loads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+        }
+
+
+def _title_key(title):
+    # title 컬럼은 varbinary
+    return title.decode("utf-8") if isinstance(title, (bytes, bytearray)) else title
+
+
+scenario_catalog = ScenarioCatalog()
@@ -0,0 +1,217 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+from mysql.connector import Error
+import logging
+import threading
+import json
+import time
+import re
+import os
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+# 느린 쿼리 로그 설정
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))              # 이 시간(ms) 이상 걸린 쿼리를 기록 (음수면 끔)
+SLOW_QUERY_KEEP = int(os.getenv("SLOW_QUERY_KEEP", 200))            # /debug/slow_queries 로 보여줄 최근 기록 수
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1"    # 문장별로 한 번 EXPLAIN 실행
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE")              # 지정하면 회전 로그 파일에도 기록
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5))
+
+EXPLAINABLE = ("select", "update", "delete", "insert", "replace", "with")
+
+# 현재 DB 스레드가 실행 중인 DB 함수 이름 (db._call_with_connection 이 설정)
+query_context = threading.local()
+
+
+def normalize(statement):
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+def params_shape(params):
+    # 값 대신 타입과 개수만 남긴다 (IN 목록 길이 확인용): "str,str,int*250"
+    if params is None:
+        return ""
+    if isinstance(params, dict):
+        params = list(params.values())
+    shape = []
+    for value in params:
+        name = type(value).__name__
+        if shape and shape[-1][0] == name:
+            shape[-1][1] += 1
+        else:
+            shape.append([name, 1])
+    return ",".join(name if count == 1 else f"{name}*{count}" for name, count in shape)
+
+
+class SlowQueryLog:
+    """임계값을 넘은 쿼리를 최근 목록(메모리)과 회전 로그 파일에 남긴다.
+
+    EXPLAIN 은 원래 연결에 읽지 않은 결과가 남아 있을 수 있으므로, 전용 스레드가 따로 연
+    연결에서 문장별로 한 번만 실행한다.
+    """
+
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, keep=SLOW_QUERY_KEEP, explain=SLOW_QUERY_EXPLAIN,
+                 log_file=SLOW_QUERY_LOG_FILE):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=keep)
+        self._statements = {}    # 문장 -> {"count", "max_ms", "total_ms", "explain"}
+        self._explain_executor = None
+        self._explain_conn = None
+        self._logger = None
+        if log_file:
+            self._logger = logging.getLogger("slow_query")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            handler = RotatingFileHandler(log_file, maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                                          backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._logger.addHandler(handler)
+
+    @property
+    def enabled(self):
+        return self.threshold >= 0
+
+    def record(self, statement, params, rowcount, seconds, many=False):
+        statement = normalize(statement)
+        entry = {
+            "query": getattr(query_context, "name", None),
+            "statement": statement,
+            "params": f"{len(params)} rows" if many else params_shape(params),
+            "rowcount": rowcount,
+            "duration_ms": round(seconds * 1000, 2),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with self._lock:
+            self._recent.append(entry)
+            stats = self._statements.get(statement)
+            first = stats is None
+            if first:
+                stats = self._statements[statement] = {"count": 0, "max_ms": 0.0, "total_ms": 0.0, "explain": None}
+            stats["count"] += 1
+            stats["total_ms"] += entry["duration_ms"]
+            stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+
+        if self._logger:
+            self._logger.info(json.dumps(entry, ensure_ascii=False))
+        if first and self.explain and statement.lower().startswith(EXPLAINABLE):
+            sample = params[0] if many and params else params
+            self._submit_explain(statement, sample)
+
+    def _submit_explain(self, statement, params):
+        with self._lock:
+            if self._explain_executor is None:
+                self._explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self._explain_executor.submit(self._run_explain, statement, params)
+
+    def _run_explain(self, statement, params):
+        from db import _connect
+
+        try:
+            if self._explain_conn is None or not self._explain_conn.is_connected():
+                self._explain_conn = _connect()
+            cursor = self._explain_conn.cursor(dictionary=True)
+            try:
+                cursor.execute("EXPLAIN " + statement, params)
+                plan = [{key: _plain(value) for key, value in row.items()} for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Error as e:
+            plan = {"error": str(e)}
+
+        with self._lock:
+            self._statements[statement]["explain"] = plan
+        if self._logger:
+            self._logger.info(json.dumps({"explain": statement, "plan": plan}, ensure_ascii=False, default=str))
+
+    def stats(self):
+        with self._lock:
+            statements = [
+                {"statement": statement, **stats, "total_ms": round(stats["total_ms"], 2)}
+                for statement, stats in self._statements.items()
+            ]
+            recent = list(self._recent)
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "statements": statements,
+            "recent": recent[::-1],
+        }
+
+    def close(self):
+        if self._explain_executor is not None:
+            self._explain_executor.shutdown(wait=True)
+        if self._explain_conn is not None:
+            try:
+                self._explain_conn.close()
+            except Error:
+                pass
+
+
+def _plain(value):
+    return value.decode("utf-8", "replace") if isinstance(value, (bytes, bytearray)) else value
+
+
+class TracingCursor:
+    """커서 래퍼. execute 부터 결과를 다 읽을 때까지(다음 execute 또는 close) 걸린 시간을 잰다.
+
+    mysql-connector 의 기본 커서는 execute 뒤 fetch 에서 행을 읽으므로 fetch 시간도 합산한다.
+    """
+
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+        self._pending = None    # (문장, 파라미터, executemany 여부)
+        self._elapsed = 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _timed(self, func, *args):
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started_at
+
+    def _finish(self):
+        if self._pending is not None and self._elapsed >= self._log.threshold:
+            statement, params, many = self._pending
+            self._log.record(statement, params, self._cursor.rowcount, self._elapsed, many)
+        self._pending = None
+        self._elapsed = 0.0
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._finish()
+        self._pending = (operation, params, False)
+        return self._timed(lambda: self._cursor.execute(operation, params, *args, **kwargs))
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._finish()
+        seq_params = list(seq_params)
+        self._pending = (operation, seq_params, True)
+        return self._timed(lambda: self._cursor.executemany(operation, seq_params, *args, **kwargs))
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(lambda: self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall)
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+
+slow_query_log = SlowQueryLog()
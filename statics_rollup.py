@@ -0,0 +1,359 @@
+"""사용자/프로필/일자별 학습 통계 롤업 (statics_rollup 테이블).
+
+/learn/start, /learn/step(s), /learn/ai_report 의 쓰기와 같은 트랜잭션에서 증분 갱신되고,
+/statics 는 원본 테이블 대신 기간 내 롤업 행을 합산한다.
+
+재구축: python statics_rollup.py rebuild [--user-id ID --profile-name NAME]
+"""
+from datetime import datetime, time, timedelta
+import argparse
+
+# /statics 가 돌려주는 값 + 학습 기록 수
+COUNTERS = [
+    "learning_log_cnt",
+    "whole_response_cnt",
+    "responsed_question_cnt",
+    "expected_question_cnt",
+    "eval_response_cnt",
+    "correct_response_cnt",
+    "timeout_response_cnt",
+]
+
+# 학습 기록 단위 집계. {where} 에는 learning_logs l 에 대한 조건이 들어간다
+#   whole_response_cnt     : 전체 응답수
+#   responsed_question_cnt : 응답한 문항수 (학습 기록별 서로 다른 sceneId 수)
+#   expected_question_cnt  : 전체 문항수
+#   eval_response_cnt      : 리포트가 생성된 학습 기록의 응답수
+AGGREGATE_SELECT = """
+    SELECT
+        {group_columns}
+        COUNT(*) AS learning_log_cnt,
+        COALESCE(SUM(a.answer_cnt), 0) AS whole_response_cnt,
+        COALESCE(SUM(a.scene_cnt), 0) AS responsed_question_cnt,
+        COALESCE(SUM(s.scene_cnt), 0) AS expected_question_cnt,
+        COALESCE(SUM(CASE WHEN lr.learning_log_id IS NOT NULL THEN a.answer_cnt END), 0) AS eval_response_cnt,
+        COALESCE(SUM(st.correct_response_cnt), 0) AS correct_response_cnt,
+        COALESCE(SUM(st.timeout_response_cnt), 0) AS timeout_response_cnt
+    FROM edu_for_disabled.learning_logs l
+    LEFT JOIN edu_for_disabled.scenario s ON s.scenario_id = l.scenario_id
+    LEFT JOIN (
+        SELECT
+            ans.learning_log_id,
+            COUNT(*) AS answer_cnt,
+            COUNT(DISTINCT ans.sceneId) AS scene_cnt
+        FROM edu_for_disabled.answers ans
+        JOIN edu_for_disabled.learning_logs ll ON ll.learning_log_id = ans.learning_log_id
+        WHERE {answers_where}
+        GROUP BY ans.learning_log_id
+    ) a ON a.learning_log_id = l.learning_log_id
+    LEFT JOIN edu_for_disabled.learning_report lr ON lr.learning_log_id = l.learning_log_id
+    LEFT JOIN edu_for_disabled.statics st ON st.learning_log_id = l.learning_log_id
+    WHERE {where}
+    {group_by}
+"""
+
+ROLLUP_UPSERT = """
+    INSERT INTO edu_for_disabled.statics_rollup (
+        user_id, profile_name, day, {columns}
+    ) VALUES {values}
+    ON DUPLICATE KEY UPDATE
+        {updates}
+"""
+
+
+def _zero():
+    return {name: 0 for name in COUNTERS}
+
+
+def _log_filter(start, end, alias):
+    where = f"{alias}.user_id = %s AND {alias}.profile_name = %s"
+    if start is not None and end is not None:
+        where += f" AND {alias}.time BETWEEN %s AND %s"
+    return where
+
+
+# 원본 테이블에서 한 번에 집계 (롤업을 쓸 수 없는 구간용)
+def aggregate_statistics(conn, user_id, profile_name, start=None, end=None):
+    params = [user_id, profile_name]
+    if start is not None and end is not None:
+        params.extend([start, end])
+
+    query = AGGREGATE_SELECT.format(
+        group_columns="",
+        answers_where=_log_filter(start, end, "ll"),
+        where=_log_filter(start, end, "l"),
+        group_by="",
+    )
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, tuple(params + params))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    return {name: int(row[name]) for name in COUNTERS} if row else _zero()
+
+
+def _sum_rollup(conn, user_id, profile_name, first_day=None, last_day=None):
+    query = "SELECT " + ", ".join(f"COALESCE(SUM({name}), 0) AS {name}" for name in COUNTERS) + """
+        FROM edu_for_disabled.statics_rollup
+        WHERE user_id = %s AND profile_name = %s
+    """
+    params = [user_id, profile_name]
+    if first_day is not None:
+        query += " AND day BETWEEN %s AND %s"
+        params.extend([first_day, last_day])
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(query, tuple(params))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    return {name: int(row[name]) for name in COUNTERS}
+
+
+def _add(totals, other):
+    for name in COUNTERS:
+        totals[name] += other[name]
+    return totals
+
+
+def rollup_statistics(conn, user_id, profile_name, start_date=None, end_date=None):
+    # 기간이 없으면 프로필의 롤업 전체 합계
+    if not (start_date and end_date):
+        return _sum_rollup(conn, user_id, profile_name)
+
+    try:
+        start = datetime.fromisoformat(start_date)
+        end = datetime.fromisoformat(end_date)
+    except ValueError:
+        return aggregate_statistics(conn, user_id, profile_name, start_date, end_date)
+    if start.tzinfo is not None or end.tzinfo is not None:
+        return aggregate_statistics(conn, user_id, profile_name, start_date, end_date)
+    if start > end:
+        return _zero()
+
+    # 기간에 온전히 포함되는 날짜만 롤업으로 합산 (time BETWEEN start AND end 와 같은 의미)
+    first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = end.date() if end.time() >= time(23, 59, 59) else end.date() - timedelta(days=1)
+    if first_day > last_day:
+        return aggregate_statistics(conn, user_id, profile_name, start, end)
+
+    totals = _sum_rollup(conn, user_id, profile_name, first_day, last_day)
+
+    # 앞뒤 경계의 일부 날짜는 원본 데이터로 집계
+    first_midnight = datetime.combine(first_day, time.min)
+    if start < first_midnight:
+        _add(totals, aggregate_statistics(conn, user_id, profile_name, start, first_midnight - timedelta(seconds=1)))
+    after_last = datetime.combine(last_day + timedelta(days=1), time.min)
+    if end >= after_last:
+        _add(totals, aggregate_statistics(conn, user_id, profile_name, after_last, end))
+
+    return totals
+
+
+def _upsert(cursor, user_id, profile_name, day, deltas):
+    _upsert_many(cursor, {(user_id, profile_name, day): deltas})
+
+
+# deltas_by_day = {(user_id, profile_name, day): {카운터: 증가량}} 을 한 번의 multi-row UPSERT 로 반영
+def _upsert_many(cursor, deltas_by_day):
+    columns = [name for name in COUNTERS if any(deltas.get(name) for deltas in deltas_by_day.values())]
+    if not columns:
+        return
+    # 잠금 순서를 고정하도록 키 순으로 정렬
+    keys = sorted(key for key, deltas in deltas_by_day.items() if any(deltas.get(name) for name in columns))
+    row = "(%s, %s, %s, " + ", ".join(["%s"] * len(columns)) + ")"
+    query = ROLLUP_UPSERT.format(
+        columns=", ".join(columns),
+        values=", ".join([row] * len(keys)),
+        updates=",\n        ".join(f"{name} = {name} + VALUES({name})" for name in columns),
+    )
+    params = []
+    for key in keys:
+        params.extend(key)
+        params.extend(deltas_by_day[key].get(name, 0) for name in columns)
+    cursor.execute(query, params)
+
+
+# 학습 시작: learning_logs INSERT 직후, 같은 트랜잭션에서 호출
+def record_learning_start(conn, learning_log_id):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            INSERT INTO edu_for_disabled.statics_rollup (
+                user_id, profile_name, day, learning_log_cnt, expected_question_cnt
+            )
+            SELECT l.user_id, l.profile_name, DATE(l.time), 1, COALESCE(s.scene_cnt, 0)
+            FROM edu_for_disabled.learning_logs l
+            LEFT JOIN edu_for_disabled.scenario s ON s.scenario_id = l.scenario_id
+            WHERE l.learning_log_id = %s
+            ON DUPLICATE KEY UPDATE
+                learning_log_cnt = learning_log_cnt + VALUES(learning_log_cnt),
+                expected_question_cnt = expected_question_cnt + VALUES(expected_question_cnt)
+            """,
+            (learning_log_id,),
+        )
+    finally:
+        cursor.close()
+
+
+# 학습 기록 행만 잠근다. learning_report / statics 는 잠그지 않고 잠금을 잡은 뒤 일반 SELECT 로 읽는다
+# (없는 행까지 FOR UPDATE 로 읽으면 간격 잠금이 걸려 동시 INSERT 와 교착)
+# 트랜잭션의 첫 일반 읽기가 잠금 뒤에 오므로 그 시점의 최신 커밋을 본다 (풀 반납 시 rollback)
+def _lock_log(cursor, learning_log_id):
+    cursor.execute(
+        """
+        SELECT user_id, profile_name, DATE(time)
+        FROM edu_for_disabled.learning_logs
+        WHERE learning_log_id = %s
+        FOR UPDATE
+        """,
+        (learning_log_id,),
+    )
+    return cursor.fetchone()
+
+
+# 답변 기록: answers INSERT 직전, 같은 트랜잭션에서 호출
+# rows = [(learning_log_id, sceneId, question, answer, response, time), ...]
+# 버퍼의 배치에 학습 기록이 많아도 학습 기록 수와 무관하게 쿼리 4번으로 처리한다
+def record_answers(conn, rows):
+    scenes_by_log = {}
+    for row in rows:
+        scenes_by_log.setdefault(row[0], []).append(row[1])
+    log_ids = sorted(scenes_by_log)
+    in_logs = ",".join(["%s"] * len(log_ids))
+
+    cursor = conn.cursor()
+    try:
+        # 배치의 학습 기록 행을 id 순으로 한 번에 잠가 같은 기록에 대한 동시 기록을 직렬화 (교착 방지)
+        cursor.execute(
+            f"""
+            SELECT learning_log_id, user_id, profile_name, DATE(time)
+            FROM edu_for_disabled.learning_logs
+            WHERE learning_log_id IN ({in_logs})
+            ORDER BY learning_log_id
+            FOR UPDATE
+            """,
+            log_ids,
+        )
+        # 없는 학습 기록은 answers INSERT 에서 외래 키 오류가 난다
+        logs = {row[0]: row[1:] for row in cursor.fetchall()}
+        if not logs:
+            return
+
+        cursor.execute(
+            f"SELECT learning_log_id FROM edu_for_disabled.learning_report WHERE learning_log_id IN ({in_logs})",
+            log_ids,
+        )
+        reported = {row[0] for row in cursor.fetchall()}
+
+        scenes = sorted({scene_id for scene_ids in scenes_by_log.values() for scene_id in scene_ids})
+        cursor.execute(
+            f"""
+            SELECT DISTINCT learning_log_id, sceneId
+            FROM edu_for_disabled.answers
+            WHERE learning_log_id IN ({in_logs}) AND sceneId IN ({",".join(["%s"] * len(scenes))})
+            """,
+            (*log_ids, *scenes),
+        )
+        answered = {(row[0], row[1]) for row in cursor.fetchall()}
+
+        deltas_by_day = {}
+        for learning_log_id, (user_id, profile_name, day) in logs.items():
+            scene_ids = scenes_by_log[learning_log_id]
+            new_scenes = {scene_id for scene_id in scene_ids if (learning_log_id, scene_id) not in answered}
+            deltas = deltas_by_day.setdefault((user_id, profile_name, day), _zero())
+            deltas["whole_response_cnt"] += len(scene_ids)
+            deltas["responsed_question_cnt"] += len(new_scenes)
+            if learning_log_id in reported:
+                deltas["eval_response_cnt"] += len(scene_ids)
+        _upsert_many(cursor, deltas_by_day)
+    finally:
+        cursor.close()
+
+
+# 리포트 저장: learning_report / statics UPSERT 직전, 같은 트랜잭션에서 호출
+def record_report(conn, learning_log_id, correct_response_cnt, timeout_response_cnt):
+    cursor = conn.cursor()
+    try:
+        log = _lock_log(cursor, learning_log_id)
+        if not log:
+            return
+        user_id, profile_name, day = log
+
+        cursor.execute(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM edu_for_disabled.learning_report lr WHERE lr.learning_log_id = %s),
+                st.correct_response_cnt, st.timeout_response_cnt,
+                (SELECT COUNT(*) FROM edu_for_disabled.answers a WHERE a.learning_log_id = %s)
+            FROM (SELECT 1) one
+            LEFT JOIN edu_for_disabled.statics st ON st.learning_log_id = %s
+            """,
+            (learning_log_id, learning_log_id, learning_log_id),
+        )
+        reported, old_correct, old_timeout, answer_cnt = cursor.fetchone()
+
+        _upsert(cursor, user_id, profile_name, day, {
+            "eval_response_cnt": 0 if reported else answer_cnt,
+            "correct_response_cnt": correct_response_cnt - (old_correct or 0),
+            "timeout_response_cnt": timeout_response_cnt - (old_timeout or 0),
+        })
+    finally:
+        cursor.close()
+
+
+# 원본 테이블에서 롤업을 다시 만든다 (백필/복구)
+def rebuild(conn, user_id=None, profile_name=None):
+    columns = []
+    params = []
+    if user_id is not None:
+        columns.append("user_id")
+        params.append(user_id)
+        if profile_name is not None:
+            columns.append("profile_name")
+            params.append(profile_name)
+
+    def scope(alias):
+        return " AND ".join(f"{alias}{column} = %s" for column in columns) or "1 = 1"
+
+    select = AGGREGATE_SELECT.format(
+        group_columns="l.user_id, l.profile_name, DATE(l.time) AS day,",
+        answers_where=scope("ll."),
+        where=scope("l."),
+        group_by="GROUP BY l.user_id, l.profile_name, DATE(l.time)",
+    )
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM edu_for_disabled.statics_rollup WHERE " + scope(""), tuple(params))
+        cursor.execute(
+            f"INSERT INTO edu_for_disabled.statics_rollup (user_id, profile_name, day, {', '.join(COUNTERS)})"
+            + select,
+            tuple(params + params),
+        )
+        rows = cursor.rowcount
+        conn.commit()
+    finally:
+        cursor.close()
+    return rows
+
+
+if __name__ == "__main__":
+    from db import _connect
+
+    parser = argparse.ArgumentParser(description="statics_rollup 관리")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--user-id")
+    parser.add_argument("--profile-name")
+    args = parser.parse_args()
+
+    connection = _connect()
+    try:
+        count = rebuild(connection, args.user_id, args.profile_name)
+        print(f"statics_rollup rebuilt: {count} rows")
+    finally:
+        connection.close()